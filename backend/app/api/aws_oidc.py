@@ -1,19 +1,109 @@
 from fastapi import APIRouter, Depends, HTTPException
-from pydantic import BaseModel
+from pydantic import BaseModel, field_validator
 from typing import List, Optional
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import time
 import boto3
-from app.api.deps import get_current_user
+from app.api.deps import cloud_rate_limit
 from app.models.rbac import User
 from app.services.cloud_integrations import CloudIntegrationService
+from app.core.ttl_cache import TTLCache
 
 router = APIRouter()
 
+# Bounded pool for blocking boto3 calls, including fan-out (e.g. one describe_instances per region)
+_aws_executor = ThreadPoolExecutor(max_workers=20, thread_name_prefix="aws-fanout")
+
+
+# Sessions and clients hold the temporary credentials they were built with, so they are
+# cached only until those credentials expire
+_aws_sessions = TTLCache(maxsize=128)
+_aws_clients = TTLCache(maxsize=512)
+
+
+def _client(creds: dict, service: str, region: Optional[str] = None):
+    """
+    Cached boto3 client for `service` using the given temporary credentials.
+    
+    Building a session loads botocore's data files and building a client resolves the
+    endpoint and event hooks (tens of milliseconds), and the client owns the HTTPS
+    connection pool, so both are reused per STS credential set. boto3 clients are
+    thread-safe once created; creating them is not, so call this from the event loop.
+    """
+    client_region = region or creds['region']
+    ttl = creds.get('expiration_ts', 0) - time.time()
+    client_key = (creds['access_key_id'], service, client_region)
+    client = _aws_clients.get(client_key)
+    if client is None:
+        session_key = creds['access_key_id']
+        session = _aws_sessions.get(session_key)
+        if session is None:
+            session = boto3.session.Session(
+                aws_access_key_id=creds['access_key_id'],
+                aws_secret_access_key=creds['secret_access_key'],
+                aws_session_token=creds['session_token'],
+                region_name=creds['region']
+            )
+            _aws_sessions.set(session_key, session, ttl=ttl)
+        client = session.client(service, region_name=client_region)
+        _aws_clients.set(client_key, client, ttl=ttl)
+    return client
+
+
+# Regions the EC2 endpoints may query: the commercial partition as known to the installed botocore
+AWS_REGIONS = frozenset(boto3.session.Session().get_available_regions('ec2'))
+
+
+# Page size for EC2 DescribeInstances (API maximum is 1000)
+EC2_PAGE_SIZE = 500
+
+
+def _describe_instances(client, region: str, states: Optional[List[str]]) -> List[dict]:
+    """Page through DescribeInstances for one region, keeping only the fields we return"""
+    paginate_kwargs = {"PaginationConfig": {"PageSize": EC2_PAGE_SIZE}}
+    if states:
+        # Let AWS drop non-matching instances instead of shipping them back
+        paginate_kwargs["Filters"] = [{"Name": "instance-state-name", "Values": states}]
+    pages = client.get_paginator('describe_instances').paginate(**paginate_kwargs)
+    return [
+        {
+            "id": instance['InstanceId'],
+            "type": instance['InstanceType'],
+            "state": instance['State']['Name'],
+            "region": region
+        }
+        for page in pages
+        for reservation in page['Reservations']
+        for instance in reservation['Instances']
+    ]
+
 class AwsResourceRequest(BaseModel):
     region: str = "us-east-1"
+    regions: Optional[List[str]] = None  # Query several regions concurrently; overrides `region`
+    states: Optional[List[str]] = None  # e.g. ["running"]; filtered server-side by EC2
+    
+    @field_validator('region')
+    @classmethod
+    def validate_region(cls, v: str) -> str:
+        if v not in AWS_REGIONS:
+            raise ValueError(f"Unknown AWS region: {v}")
+        return v
+    
+    @field_validator('regions')
+    @classmethod
+    def validate_regions(cls, v: Optional[List[str]]) -> Optional[List[str]]:
+        """Known regions only, each queried once (which also bounds the fan-out)"""
+        if v is None:
+            return v
+        unknown = [region for region in v if region not in AWS_REGIONS]
+        if unknown:
+            raise ValueError(f"Unknown AWS regions: {', '.join(unknown)}")
+        return list(dict.fromkeys(v))
 
 @router.post("/cloud/aws/role-test")
 async def aws_role_test(
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(cloud_rate_limit)
 ):
     """
     Test AWS integration by getting CallerIdentity.
@@ -21,19 +111,14 @@ async def aws_role_test(
     """
     # Note: Pass user_id and optional role_arn from user profile
     creds = await CloudIntegrationService.get_aws_credentials(
-        user_id=str(current_user.id),
+        user_id=current_user.id_str,
         role_arn=current_user.aws_role_arn
     )
     
-    client = boto3.client(
-        'sts',
-        aws_access_key_id=creds['access_key_id'],
-        aws_secret_access_key=creds['secret_access_key'],
-        aws_session_token=creds['session_token'],
-        region_name=creds['region']
-    )
+    client = _client(creds, 'sts')
     
-    response = client.get_caller_identity()
+    loop = asyncio.get_running_loop()
+    response = await loop.run_in_executor(_aws_executor, client.get_caller_identity)
     return {
         "Arn": response['Arn'],
         "UserId": response['UserId'],
@@ -42,52 +127,39 @@ async def aws_role_test(
 
 @router.post("/cloud/aws/s3/list")
 async def list_s3_buckets(
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(cloud_rate_limit)
 ):
     """List S3 buckets using assumed role"""
     creds = await CloudIntegrationService.get_aws_credentials(
-        user_id=str(current_user.id),
+        user_id=current_user.id_str,
         role_arn=current_user.aws_role_arn
     )
     
-    client = boto3.client(
-        's3',
-        aws_access_key_id=creds['access_key_id'],
-        aws_secret_access_key=creds['secret_access_key'],
-        aws_session_token=creds['session_token'],
-        region_name=creds['region']
-    )
+    client = _client(creds, 's3')
     
-    response = client.list_buckets()
+    loop = asyncio.get_running_loop()
+    response = await loop.run_in_executor(_aws_executor, client.list_buckets)
     return {"buckets": [b['Name'] for b in response.get('Buckets', [])]}
 
 @router.post("/cloud/aws/ec2/instances")
 async def list_ec2_instances(
     request: AwsResourceRequest,
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(cloud_rate_limit)
 ):
     """List EC2 instances using assumed role"""
     creds = await CloudIntegrationService.get_aws_credentials(
-        user_id=str(current_user.id),
+        user_id=current_user.id_str,
         role_arn=current_user.aws_role_arn
     )
     
-    client = boto3.client(
-        'ec2',
-        aws_access_key_id=creds['access_key_id'],
-        aws_secret_access_key=creds['secret_access_key'],
-        aws_session_token=creds['session_token'],
-        region_name=request.region
-    )
+    regions = request.regions or [request.region]
+    # Clients are created here (session.client is not thread-safe) and only used from the pool
+    clients = [_client(creds, 'ec2', region) for region in regions]
+    
+    loop = asyncio.get_running_loop()
+    results = await asyncio.gather(*[
+        loop.run_in_executor(_aws_executor, _describe_instances, client, region, request.states)
+        for client, region in zip(clients, regions)
+    ])
     
-    response = client.describe_instances()
-    instances = []
-    for reservation in response['Reservations']:
-        for instance in reservation['Instances']:
-            instances.append({
-                "id": instance['InstanceId'],
-                "type": instance['InstanceType'],
-                "state": instance['State']['Name']
-            })
-            
-    return {"instances": instances}
+    return {"instances": [instance for region_instances in results for instance in region_instances]}
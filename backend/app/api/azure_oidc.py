@@ -1,95 +1,129 @@
 from fastapi import APIRouter, Depends, HTTPException
-from typing import Dict, Any
-import httpx
-from app.api.deps import get_current_user
+from fastapi.responses import Response
+from typing import Dict, Any, List
+from app.api.deps import cloud_rate_limit
 from app.models.rbac import User
 from app.services.cloud_integrations import CloudIntegrationService
 from app.config import settings
+from app.core.http_client import get_http_client
+from app.core.ttl_cache import TTLCache
+import asyncio
+import httpx
 
 router = APIRouter()
 
+# Subscription IDs visible to a user rarely change; cache them for 10 minutes
+SUBSCRIPTION_CACHE_TTL = 600
+_subscription_cache = TTLCache(maxsize=1024)
+
+# Upper bound on concurrent ARM requests issued by a single endpoint call
+ARM_MAX_CONCURRENCY = 20
+
+
+def _passthrough(resp: httpx.Response) -> Response:
+    """Forward an ARM response body as-is instead of parsing and re-serializing it"""
+    return Response(content=resp.content, media_type="application/json", status_code=resp.status_code)
+
+
+async def _get_subscription_ids(
+    user_id: str,
+    client: httpx.AsyncClient,
+    access_token: str
+) -> List[str]:
+    """Return the subscription IDs for a user, hitting ARM only on a cache miss"""
+    cached = _subscription_cache.get(user_id)
+    if cached is not None:
+        return cached
+    
+    sub_resp = await client.get(
+        "https://management.azure.com/subscriptions?api-version=2020-01-01",
+        headers={"Authorization": f"Bearer {access_token}"}
+    )
+    
+    if sub_resp.status_code != 200:
+        raise HTTPException(status_code=sub_resp.status_code, detail=sub_resp.text)
+    
+    sub_ids = [sub['subscriptionId'] for sub in sub_resp.json().get('value', [])]
+    _subscription_cache.set(user_id, sub_ids, ttl=SUBSCRIPTION_CACHE_TTL)
+    return sub_ids
+
 @router.post("/cloud/azure/run-test")
 async def azure_run_test(
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(cloud_rate_limit)
 ):
     """
     Test Azure integration.
     Tries to list subscriptions.
     """
-    token_data = await CloudIntegrationService.get_azure_token(str(current_user.id))
+    token_data = await CloudIntegrationService.get_azure_token(current_user.id_str)
     access_token = token_data['access_token']
     
-    async with httpx.AsyncClient() as client:
-        resp = await client.get(
-            "https://management.azure.com/subscriptions?api-version=2020-01-01",
-            headers={"Authorization": f"Bearer {access_token}"}
-        )
+    client = get_http_client()
+    resp = await client.get(
+        "https://management.azure.com/subscriptions?api-version=2020-01-01",
+        headers={"Authorization": f"Bearer {access_token}"}
+    )
+    
+    if resp.status_code != 200:
+        raise HTTPException(status_code=resp.status_code, detail=resp.text)
         
-        if resp.status_code != 200:
-            raise HTTPException(status_code=resp.status_code, detail=resp.text)
-            
-        return resp.json()
+    return _passthrough(resp)
 
 @router.post("/cloud/azure/resource-groups")
 async def list_azure_resource_groups(
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(cloud_rate_limit)
 ):
     """List Resource Groups in the first subscription found"""
-    token_data = await CloudIntegrationService.get_azure_token(str(current_user.id))
+    token_data = await CloudIntegrationService.get_azure_token(current_user.id_str)
     access_token = token_data['access_token']
     
-    async with httpx.AsyncClient() as client:
-        # Get Subscription ID
-        sub_resp = await client.get(
-            "https://management.azure.com/subscriptions?api-version=2020-01-01",
-            headers={"Authorization": f"Bearer {access_token}"}
-        )
+    client = get_http_client()
+    # Get Subscription ID
+    sub_ids = await _get_subscription_ids(current_user.id_str, client, access_token)
+    if not sub_ids:
+        return {"message": "No subscriptions found"}
         
-        if sub_resp.status_code != 200:
-             raise HTTPException(status_code=sub_resp.status_code, detail=sub_resp.text)
-             
-        subs = sub_resp.json().get('value', [])
-        if not subs:
-            return {"message": "No subscriptions found"}
-            
-        sub_id = subs[0]['subscriptionId']
-        
-        # List Resource Groups
-        rg_resp = await client.get(
-            f"https://management.azure.com/subscriptions/{sub_id}/resourcegroups?api-version=2021-04-01",
-            headers={"Authorization": f"Bearer {access_token}"}
-        )
-        
-        return rg_resp.json()
+    sub_id = sub_ids[0]
+    
+    # List Resource Groups
+    rg_resp = await client.get(
+        f"https://management.azure.com/subscriptions/{sub_id}/resourcegroups?api-version=2021-04-01",
+        headers={"Authorization": f"Bearer {access_token}"}
+    )
+    
+    return _passthrough(rg_resp)
 
 @router.post("/cloud/azure/vms")
 async def list_azure_vms(
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(cloud_rate_limit)
 ):
-    """List Virtual Machines in the first subscription found"""
-    token_data = await CloudIntegrationService.get_azure_token(str(current_user.id))
+    """List Virtual Machines across all subscriptions found (first page of each subscription)"""
+    token_data = await CloudIntegrationService.get_azure_token(current_user.id_str)
     access_token = token_data['access_token']
+    headers = {"Authorization": f"Bearer {access_token}"}
     
-    async with httpx.AsyncClient() as client:
-        # Get Subscription ID
-        sub_resp = await client.get(
-            "https://management.azure.com/subscriptions?api-version=2020-01-01",
-            headers={"Authorization": f"Bearer {access_token}"}
-        )
-        
-        if sub_resp.status_code != 200:
-             raise HTTPException(status_code=sub_resp.status_code, detail=sub_resp.text)
-             
-        subs = sub_resp.json().get('value', [])
-        if not subs:
-            return {"message": "No subscriptions found"}
-            
-        sub_id = subs[0]['subscriptionId']
-        
-        # List VMs
-        vm_resp = await client.get(
-            f"https://management.azure.com/subscriptions/{sub_id}/providers/Microsoft.Compute/virtualMachines?api-version=2021-03-01",
-            headers={"Authorization": f"Bearer {access_token}"}
-        )
-        
-        return vm_resp.json()
+    client = get_http_client()
+    sub_ids = await _get_subscription_ids(current_user.id_str, client, access_token)
+    if not sub_ids:
+        return {"message": "No subscriptions found"}
+    
+    # List VMs in every subscription concurrently (bounded), multiplexed on the shared client
+    semaphore = asyncio.Semaphore(ARM_MAX_CONCURRENCY)
+    
+    async def fetch_vms(sub_id: str) -> httpx.Response:
+        async with semaphore:
+            return await client.get(
+                f"https://management.azure.com/subscriptions/{sub_id}/providers/Microsoft.Compute/virtualMachines?api-version=2021-03-01",
+                headers=headers
+            )
+    
+    responses = await asyncio.gather(*[fetch_vms(sub_id) for sub_id in sub_ids])
+    
+    # Every subscription is checked the same way; the first ARM error is surfaced with its status.
+    # Only the first page per subscription is returned: nextLink is not followed.
+    vms = []
+    for vm_resp in responses:
+        if vm_resp.status_code != 200:
+            raise HTTPException(status_code=vm_resp.status_code, detail=vm_resp.text)
+        vms.extend(vm_resp.json().get('value', []))
+    return {"value": vms}
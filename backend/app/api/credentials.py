@@ -1,8 +1,11 @@
 """Cloud credentials management API (Admin only)"""
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from typing import List
+from datetime import datetime, timezone
 
 from app.database import get_db
 from app.models import CloudCredential, CloudProvider, User
@@ -31,33 +34,32 @@ async def create_credential(
             detail=f"Invalid provider. Must be one of: {', '.join([p.value for p in CloudProvider])}"
         )
     
-    # Check if credential with this name exists
-    result = await db.execute(
-        select(CloudCredential).where(CloudCredential.name == credential.name)
-    )
-    existing = result.scalar_one_or_none()
-    
-    # Encrypt credentials
-    encrypted_data = crypto_service.encrypt(credential.credentials)
+    # Encrypt credentials off the event loop
+    encrypted_data = await run_in_threadpool(crypto_service.encrypt, credential.credentials)
     
-    if existing:
-        # Update existing
-        existing.provider = provider_enum
-        existing.encrypted_data = encrypted_data
-        await db.commit()
-        await db.refresh(existing)
-        return existing
-    else:
-        # Create new
-        new_credential = CloudCredential(
+    # Create or update in a single round-trip (name is unique)
+    stmt = (
+        pg_insert(CloudCredential)
+        .values(
             name=credential.name,
             provider=provider_enum,
             encrypted_data=encrypted_data
         )
-        db.add(new_credential)
-        await db.commit()
-        await db.refresh(new_credential)
-        return new_credential
+        .on_conflict_do_update(
+            index_elements=[CloudCredential.name],
+            set_={
+                "provider": provider_enum,
+                "encrypted_data": encrypted_data,
+                "updated_at": datetime.now(timezone.utc)
+            }
+        )
+        .returning(CloudCredential)
+        .execution_options(populate_existing=True)
+    )
+    result = await db.execute(stmt)
+    saved = result.scalar_one()
+    await db.commit()
+    return saved
 
 @router.get("/", response_model=List[CloudCredentialResponse])
 async def list_credentials(
@@ -1,78 +1,273 @@
-from fastapi import Depends, HTTPException, status, Request, Header, Query
+from fastapi import BackgroundTasks, Depends, HTTPException, status, Request, Header, Query
 from fastapi.security import OAuth2PasswordBearer
-from jose import JWTError, jwt
+import jwt
+from jwt import PyJWTError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy.orm import selectinload
-from typing import Optional, List
+from sqlalchemy.orm import joinedload, raiseload
+from functools import lru_cache
+from typing import Optional
+import base64
+import hashlib
+import json
+import time
 import uuid
 from app.database import get_db
 from app.models.rbac import User, Organization
 from app.config import settings
-from app.core.organization import get_user_organization, get_organization_domain
+from app.core.organization import get_user_organization_domain
+from app.core.ttl_cache import TTLCache
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/auth/login")
 
+# Verified tokens: token fingerprint -> user_id ("" if not an access token), kept until shortly before `exp`
+TOKEN_CACHE_EXPIRY_MARGIN = 30
+_token_cache = TTLCache(maxsize=8192)
+_TOKEN_FINGERPRINT_KEY = settings.SECRET_KEY.encode()[:64]
+
+# Verification key prepared once (bytes for HS*, a parsed key object for RS*/ES*) so
+# jwt.decode doesn't re-encode/re-parse it per request. Rotating SECRET_KEY needs a restart,
+# as it already did for the settings object.
+_JWT_ALGORITHMS = [settings.ALGORITHM]
+_JWT_VERIFY_KEY = jwt.get_algorithm_by_name(settings.ALGORITHM).prepare_key(settings.SECRET_KEY)
+
+# Detached user snapshots (with organization): user_id -> User, merged into each request's session.
+# The cache is per process: invalidate_user_cache only clears the worker that handled the change,
+# so other workers may keep authenticating a deactivated or changed user for up to USER_CACHE_TTL
+# seconds. Kept short so that window stays small while bursts of requests still share one load.
+USER_CACHE_TTL = 5
+_user_cache = TTLCache(maxsize=4096)
+
+# With RAISE_ON_LAZY_LOAD (dev/test), any other relationship access on current_user raises
+# instead of lazy loading, so N+1 patterns show up during development
+_CURRENT_USER_LOAD_OPTIONS = (joinedload(User.organization, innerjoin=True),)
+if settings.RAISE_ON_LAZY_LOAD:
+    _CURRENT_USER_LOAD_OPTIONS += (raiseload("*"),)
+
+
+def invalidate_user_cache(user_id) -> None:
+    """Drop a cached user after it is updated, deactivated or deleted (this process only)"""
+    _user_cache.pop(str(user_id))
+
+
+def clear_user_cache() -> None:
+    """Drop all cached users, e.g. after an organization they embed is updated"""
+    _user_cache.clear()
+
+
+def token_fingerprint(token: str) -> bytes:
+    """
+    Fixed-size cache key for a bearer token.
+    
+    Keyed with the app secret, so entries can't be planted or probed without it,
+    and 16 bytes per entry instead of the full multi-KB token string.
+    """
+    return hashlib.blake2b(token.encode(), digest_size=16, key=_TOKEN_FINGERPRINT_KEY).digest()
+
+
+def _is_expired_unverified(token: str) -> bool:
+    """
+    Cheap pre-check: True if the token's unverified `exp` claim is already in the past.
+    
+    Only ever used to reject early. Anything unparsable returns False so jwt.decode
+    makes the real decision; nothing is accepted without signature verification.
+    """
+    try:
+        segment = token.split(".", 2)[1]
+        claims = json.loads(base64.urlsafe_b64decode(segment + "=" * (-len(segment) % 4)))
+        exp = claims.get("exp")
+        return isinstance(exp, (int, float)) and exp <= time.time()
+    except Exception:
+        return False
+
+
+def verify_access_token(token: str) -> Optional[str]:
+    """
+    Return the user ID for a valid access token, or None if it is not an access token.
+    Raises PyJWTError if the signature or expiry check fails.
+    
+    Shared by get_current_user and the audit middleware so a token's signature is
+    checked once per lifetime rather than once per consumer per request.
+    """
+    key = token_fingerprint(token)
+    user_id = _token_cache.get(key)
+    if user_id is not None:
+        # "" marks a validly signed token that isn't an access token (e.g. a refresh token)
+        return user_id or None
+    
+    # Expired tokens are never cached; skip the signature check for them
+    if _is_expired_unverified(token):
+        raise jwt.ExpiredSignatureError("Signature has expired")
+    
+    payload = jwt.decode(token, _JWT_VERIFY_KEY, algorithms=_JWT_ALGORITHMS)
+    user_id = payload.get("sub")
+    if user_id is None or payload.get("type") != "access":
+        user_id = ""
+    
+    exp = payload.get("exp")
+    if exp:
+        _token_cache.set(key, user_id, ttl=exp - time.time() - TOKEN_CACHE_EXPIRY_MARGIN)
+    return user_id or None
+
+
+_CREDENTIALS_HEADERS = {"WWW-Authenticate": "Bearer"}
+
+
+def _credentials_exception() -> HTTPException:
+    # Built only on the failure path. A shared instance would keep growing its
+    # __traceback__ (and leak __context__ across requests) on every re-raise.
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers=_CREDENTIALS_HEADERS,
+    )
+
+
+async def _load_user_snapshot(user_id: str, db: AsyncSession) -> User:
+    """
+    Load a user into the cache, coalescing concurrent misses for the same user.
+    
+    A burst of requests carrying the same token waits on the first one's query
+    instead of each issuing its own SELECT.
+    """
+    async with _user_cache.locked(user_id):
+        user = _user_cache.get(user_id)
+        if user is not None:
+            return user
+        
+        # Async query - load organization in the same statement (many-to-one, never null)
+        result = await db.execute(
+            select(User)
+            .options(*_CURRENT_USER_LOAD_OPTIONS)
+            .where(User.id == user_id)
+        )
+        user = result.scalar_one_or_none()
+        if user is None:
+            raise _credentials_exception()
+        # Cache a detached snapshot; requests only ever see session-bound copies of it
+        db.expunge(user)
+        _user_cache.set(user_id, user, ttl=USER_CACHE_TTL)
+        return user
+
+
 async def get_current_user(
+    request: Request,
     token: str = Depends(oauth2_scheme),
     db: AsyncSession = Depends(get_db)
 ) -> User:
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
+    # Already resolved for this request (e.g. by a dependency outside FastAPI's per-call cache).
+    # Tied to the token so a manual call with different credentials isn't served the wrong user.
+    resolved = getattr(request.state, "current_user_auth", None)
+    if resolved is not None and resolved[0] == token:
+        return resolved[1]
+    
     try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        user_id: str = payload.get("sub")
-        token_type: str = payload.get("type")
-        
-        if user_id is None or token_type != "access":
-            raise credentials_exception
-            
-    except JWTError:
-        raise credentials_exception
-        
-    # Async query - eagerly load organization
-    result = await db.execute(
-        select(User)
-        .options(selectinload(User.organization))
-        .where(User.id == user_id)
-    )
-    user = result.scalars().first()
+        user_id = verify_access_token(token)
+    except PyJWTError:
+        raise _credentials_exception()
+    if user_id is None:
+        raise _credentials_exception()
     
+    user = _user_cache.get(user_id)
     if user is None:
-        raise credentials_exception
+        user = await _load_user_snapshot(user_id, db)
+    
+    # Attach a copy to this request's session without re-selecting it
+    user = await db.merge(user, load=False)
+    
     if not user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
-        
+    
+    request.state.current_user_auth = (token, user)
     return user
 
-from app.core.casbin import get_enforcer
+
+def rate_limit_per_user(scope: str, requests_per_minute: int):
+    """
+    Dependency factory enforcing a fixed one-minute window per (scope, user).
+    
+    Resolves to the current user, so it can replace Depends(get_current_user) on
+    expensive endpoints. Requests over the limit get 429 with Retry-After before
+    the endpoint body (and any upstream token exchange) runs.
+    """
+    async def dependency(current_user: User = Depends(get_current_user)) -> User:
+        from app.core.redis_client import RedisClient
+        from app.logger import logger
+        
+        now = time.time()
+        window = int(now // 60)
+        retry_after = str(60 - int(now % 60))
+        key = f"ratelimit:{scope}:{current_user.id}:{window}"
+        
+        redis_client = RedisClient.get_instance()
+        try:
+            count = await redis_client.incr(key)
+            if count == 1:
+                await redis_client.expire(key, 60)
+        except Exception as e:
+            # Don't lock users out of cloud endpoints when Redis is unavailable
+            logger.error(f"Redis rate limiting error for {scope}: {e}")
+            return current_user
+        finally:
+            await redis_client.aclose()
+        
+        if count > requests_per_minute:
+            logger.warning(f"Rate limit exceeded for user {current_user.id} on {scope}: {count} requests/minute (limit: {requests_per_minute})")
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Rate limit exceeded. Please try again later.",
+                headers={"Retry-After": retry_after}
+            )
+        return current_user
+    return dependency
+
+
+# Cloud endpoints each mint an OIDC token and hit an upstream STS/IdP on a cache miss
+cloud_rate_limit = rate_limit_per_user("cloud", requests_per_minute=60)
+
+from app.core.casbin import get_enforcer, get_base_enforcer
+from app.core.enforcer_wrapper import MultiTenantEnforcerWrapper, ensure_org_domain, unwrap_enforcer
+from app.core.permission_registry import parse_permission_slug
+from app.core.authorization import get_user_platform_roles
 from casbin import Enforcer
 
+# Key platform permissions that indicate platform admin access, parsed once to (obj, act)
+_KEY_ADMIN_PERMISSIONS = tuple(parse_permission_slug(slug) for slug in (
+    "platform:users:list",
+    "platform:roles:list",
+    "platform:business_units:create",
+    "platform:organizations:list",
+))
+
 async def is_platform_admin(user: User, db: AsyncSession, enforcer: Enforcer) -> bool:
     """
     Check if user has platform admin permissions (any platform:* permission).
     This replaces hardcoded role name checks.
+    
+    The answer is memoized on the session (one per request): get_active_business_unit,
+    check_bu_permission and the endpoint itself often ask the same question.
     """
-    from app.core.authorization import check_platform_permission
+    admin_checks = db.info.setdefault("is_platform_admin", {})
+    cached = admin_checks.get(user.id)
+    if cached is not None:
+        return cached
     
     # Check if user has any key platform permission (indicates platform admin access)
-    # We check a few key platform permissions to determine admin status
-    key_admin_permissions = [
-        "platform:users:list",
-        "platform:roles:list", 
-        "platform:business_units:create",
-        "platform:organizations:list"
-    ]
-    
-    # Try key permissions first for efficiency
-    for perm in key_admin_permissions:
-        if await check_platform_permission(user, perm, db, enforcer):
-            return True
-    
-    return False
+    # Resolve the organization domain and platform roles once instead of once per permission
+    org_domain = get_user_organization_domain(user)
+    ensure_org_domain(enforcer, org_domain)
+    platform_roles = await get_user_platform_roles(user, db, enforcer, org_domain)
+    
+    # Evaluate against the shared Casbin enforcer directly with explicit domain: one code
+    # path for every wrapper type, and each check is a CachedEnforcer memo hit after warmup
+    enforce = unwrap_enforcer(enforcer).enforce
+    is_admin = any(
+        enforce(role, org_domain, obj, act)
+        for obj, act in _KEY_ADMIN_PERMISSIONS
+        for role in platform_roles
+    )
+    admin_checks[user.id] = is_admin
+    return is_admin
 
 
 async def get_current_active_superuser(
@@ -103,37 +298,26 @@ def is_allowed(permission_slug: str):
     - User: "user:profile:read" -> obj="profile", act="read"
     
     Casbin storage format: (role/user_id, org_domain, obj, act)
+    
+    The slug is validated once when the dependency is built (at import time for
+    route decorators); a malformed slug raises ValueError there instead of a 500 per request.
     """
+    from app.core.permission_registry import parse_permission_slug
+    from app.core.authorization import check_permission
+    
+    # Warms the parse cache used by check_permission and fails fast on bad slugs
+    parse_permission_slug(permission_slug)
+    denied_detail = f"Permission denied: {permission_slug} required"
+    
     async def dependency(
         current_user: User = Depends(get_current_user),
         enforcer: Enforcer = Depends(get_enforcer),
         db: AsyncSession = Depends(get_db)
     ):
-        from app.core.permission_registry import (
-            parse_permission_slug,
-            get_permission_scope
-        )
-        from app.core.authorization import check_permission
-        
-        # Parse permission slug using the registry function
-        try:
-            obj, act = parse_permission_slug(permission_slug)
-        except ValueError as e:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Invalid permission slug: {permission_slug} - {e}"
-            )
-        
-        # Get permission scope
-        scope = get_permission_scope(permission_slug)
-        
         # Ensure enforcer has org_domain set if it's a wrapper
         # This is needed because get_enforcer() returns a MultiTenantEnforcerWrapper without org_domain
-        from app.core.organization import get_user_organization, get_organization_domain
-        org = await get_user_organization(current_user, db)
-        org_domain = get_organization_domain(org)
-        if hasattr(enforcer, 'set_org_domain') and (not hasattr(enforcer, '_org_domain') or not enforcer._org_domain):
-            enforcer.set_org_domain(org_domain)
+        org_domain = get_user_organization_domain(current_user)
+        ensure_org_domain(enforcer, org_domain)
         
         # Use the unified check_permission function which handles all scopes
         has_permission = await check_permission(
@@ -147,44 +331,12 @@ def is_allowed(permission_slug: str):
         if not has_permission:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
-                detail=f"Permission denied: {permission_slug} required"
+                detail=denied_detail
             )
         return current_user
     return dependency
 
 
-async def get_user_platform_roles(
-    user: User,
-    db: AsyncSession,
-    enforcer: Enforcer,
-    org_domain: str
-) -> List[str]:
-    """
-    Get user's platform-level roles (not BU-scoped).
-    Platform roles are roles where is_platform_role = True.
-    """
-    from app.models.rbac import Role
-    
-    # Get all roles for user in this organization
-    # Handle both OrgAwareEnforcer and base Enforcer
-    if hasattr(enforcer, '_enforcer') or hasattr(enforcer, '_org_domain'):
-        # It's OrgAwareEnforcer, don't pass org_domain
-        user_roles = enforcer.get_roles_for_user(str(user.id))
-    else:
-        # It's base Enforcer, need org_domain
-        user_roles = enforcer.get_roles_for_user(str(user.id), org_domain)
-    
-    # Filter to only platform roles
-    if not user_roles:
-        return []
-    
-    result = await db.execute(
-        select(Role).where(Role.name.in_(user_roles), Role.is_platform_role == True)
-    )
-    platform_roles = result.scalars().all()
-    return [r.name for r in platform_roles]
-
-
 async def get_bu_membership(
     user_id: uuid.UUID,
     business_unit_id: uuid.UUID,
@@ -194,17 +346,9 @@ async def get_bu_membership(
     Get user's membership in a specific business unit with role.
     Returns BusinessUnitMember if user is a member, None otherwise.
     """
-    from app.models.business_unit import BusinessUnitMember
+    from app.core.authorization import get_bu_membership as load_bu_membership
     
-    result = await db.execute(
-        select(BusinessUnitMember)
-        .options(selectinload(BusinessUnitMember.role))
-        .where(
-            BusinessUnitMember.user_id == user_id,
-            BusinessUnitMember.business_unit_id == business_unit_id
-        )
-    )
-    return result.scalar_one_or_none()
+    return await load_bu_membership(user_id, business_unit_id, db)
 
 
 async def get_user_bu_role(
@@ -249,7 +393,7 @@ async def check_bu_permission(
     from app.logger import logger
     
     # Ensure enforcer has org_domain set (if it's a wrapper)
-    if hasattr(enforcer, 'set_org_domain'):
+    if isinstance(enforcer, MultiTenantEnforcerWrapper):
         enforcer.set_org_domain(org_domain)
     
     # Check if user is platform admin using permission-based check
@@ -286,7 +430,6 @@ async def check_bu_permission(
             logger.info(f"Role '{membership.role.name}' has global permission '{permission_slug}', creating BU-scoped version for BU {business_unit_id}")
             # Use enforcer.add_policy - it will automatically add org_domain if it's a wrapper
             enforcer.add_policy(membership.role.name, org_domain, bu_obj, act)
-            enforcer.save_policy()
             has_permission = enforcer.enforce(membership.role.name, org_domain, bu_obj, act)
             if has_permission:
                 logger.info(f"Successfully created BU-scoped permission for role '{membership.role.name}': {bu_obj}:{act}")
@@ -298,7 +441,6 @@ async def check_bu_permission(
             try:
                 logger.info(f"Creating BU-scoped permissions for role '{membership.role.name}' in BU {business_unit_id} for permission {permission_slug}")
                 await create_default_bu_role_permissions(membership.role.name, business_unit_id, org_domain, enforcer)
-                enforcer.save_policy()
                 # Check again after creating permissions
                 has_permission = enforcer.enforce(membership.role.name, org_domain, bu_obj, act)
                 if has_permission:
@@ -309,6 +451,24 @@ async def check_bu_permission(
     return has_permission
 
 
+async def _create_bu_scoped_policy(role_name: str, org_domain: str, bu_obj: str, act: str) -> None:
+    """
+    Background task: copy a role's global permission to its BU-scoped form.
+    
+    Runs after the response is sent. Declared async so the policy write stays on the
+    event loop thread, serialized with request-time enforce() calls as before.
+    add_policy is persisted by the adapter's auto-save (a single INSERT).
+    """
+    from app.logger import logger
+    
+    enforcer = get_base_enforcer()
+    try:
+        enforcer.add_policy(role_name, org_domain, bu_obj, act)
+        logger.info(f"Created BU-scoped permission for role '{role_name}': {bu_obj}:{act}")
+    except Exception as e:
+        logger.error(f"Failed to create BU-scoped permission for role '{role_name}': {bu_obj}:{act}: {e}", exc_info=True)
+
+
 def is_allowed_bu(permission_slug: str, require_bu: bool = True):
     """
     Dependency for checking BU-scoped permissions.
@@ -322,36 +482,24 @@ def is_allowed_bu(permission_slug: str, require_bu: bool = True):
         permission_slug: Permission to check (e.g., "deployments:create")
         require_bu: If True, requires active business unit for BU-scoped permissions.
                     If False, allows platform-level permissions without BU.
+    
+    The slug is parsed and its scope resolved once when the dependency is built;
+    a malformed slug raises ValueError there.
     """
+    from app.core.permission_registry import resolve_permission
+    
+    scope, obj, act = resolve_permission(permission_slug)
+    
     async def dependency(
         current_user: User = Depends(get_current_user),
         business_unit_id: Optional[uuid.UUID] = Depends(get_active_business_unit),
         enforcer: Enforcer = Depends(get_enforcer),
-        db: AsyncSession = Depends(get_db)
+        db: AsyncSession = Depends(get_db),
+        background_tasks: BackgroundTasks = None
     ):
-        from app.core.permission_registry import (
-            get_permission_scope,
-            is_platform_permission,
-            is_bu_permission,
-            parse_permission_slug
-        )
-        
-        # Parse permission
-        try:
-            obj, act = parse_permission_slug(permission_slug)
-        except ValueError:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Invalid permission slug: {permission_slug}"
-            )
-        
         # Get organization domain
-        organization = await get_user_organization(current_user, db)
-        org_domain = get_organization_domain(organization)
-        user_id = str(current_user.id)
-        
-        # Check permission scope
-        scope = get_permission_scope(permission_slug)
+        org_domain = get_user_organization_domain(current_user)
+        user_id = current_user.id_str
         
         if scope == "platform":
             # Platform permission: Check platform roles only
@@ -408,29 +556,29 @@ def is_allowed_bu(permission_slug: str, require_bu: bool = True):
             has_permission = enforcer.enforce(role.name, org_domain, bu_obj, act)
             # Permission check completed
             
+            # Global (non-BU) result, checked at most once per request. Only BU-scoped
+            # policies are created below, so it can't change while this runs.
+            global_has_permission = None
+            
             # If permission doesn't exist, try to create it
             if not has_permission:
-                from app.logger import logger
                 # First check if the role has this permission globally (without BU context)
                 global_has_permission = enforcer.enforce(role.name, org_domain, obj, act)
                 
                 if global_has_permission:
-                    # Role has permission globally, create BU-scoped version
+                    # Role has permission globally: allow now, create the BU-scoped version after the response
                     logger.info(f"Role '{role.name}' has global permission '{permission_slug}', creating BU-scoped version")
-                    enforcer.add_policy(role.name, org_domain, bu_obj, act)
-                    enforcer.save_policy()
-                    has_permission = enforcer.enforce(role.name, org_domain, bu_obj, act)
-                    if has_permission:
-                        logger.info(f"Successfully created BU-scoped permission for role '{role.name}': {bu_obj}:{act}")
+                    has_permission = True
+                    if background_tasks is not None:
+                        background_tasks.add_task(_create_bu_scoped_policy, role.name, org_domain, bu_obj, act)
                     else:
-                        logger.warning(f"Failed to create BU-scoped permission for role '{role.name}': {bu_obj}:{act}")
+                        await _create_bu_scoped_policy(role.name, org_domain, bu_obj, act)
                 else:
                     # Try to create from default role permissions
                     from app.core.migrate_casbin_policies import create_default_bu_role_permissions
                     try:
                         logger.info(f"Creating BU-scoped permissions for role '{role.name}' in BU {business_unit_id} for permission {permission_slug}")
                         await create_default_bu_role_permissions(role.name, business_unit_id, org_domain, enforcer)
-                        enforcer.save_policy()
                         # Check again after creating permissions
                         has_permission = enforcer.enforce(role.name, org_domain, bu_obj, act)
                         if has_permission:
@@ -440,12 +588,11 @@ def is_allowed_bu(permission_slug: str, require_bu: bool = True):
             
             # Fallback: Check without BU prefix (for backward compatibility during migration)
             if not has_permission:
-                has_permission = enforcer.enforce(role.name, org_domain, obj, act)
+                has_permission = global_has_permission
             
             if not has_permission:
                 # Check if role has the permission globally to provide better error message
-                global_has = enforcer.enforce(role.name, org_domain, obj, act)
-                if global_has:
+                if global_has_permission:
                     # Role has permission globally but not in BU context - this shouldn't happen
                     raise HTTPException(
                         status_code=status.HTTP_403_FORBIDDEN,
@@ -484,37 +631,25 @@ def is_allowed_platform(permission_slug: str):
     Dependency for checking platform-level permissions.
     These permissions do NOT require a business unit context.
     Only checks platform roles (is_platform_role = True).
+    
+    The slug is validated once when the dependency is built; a malformed or
+    non-platform slug raises ValueError there.
     """
+    from app.core.permission_registry import resolve_permission
+    
+    scope, obj, act = resolve_permission(permission_slug)
+    # Ensure this is a platform permission
+    if scope != "platform":
+        raise ValueError(f"Permission {permission_slug} is not a platform-level permission")
+    denied_detail = f"Permission denied: {permission_slug} required (platform-level)"
+    
     async def dependency(
         current_user: User = Depends(get_current_user),
         enforcer: Enforcer = Depends(get_enforcer),
         db: AsyncSession = Depends(get_db)
     ):
-        from app.core.permission_registry import (
-            get_permission_scope,
-            parse_permission_slug
-        )
-        
-        # Ensure this is a platform permission
-        scope = get_permission_scope(permission_slug)
-        if scope != "platform":
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Permission {permission_slug} is not a platform-level permission"
-            )
-        
-        # Parse permission
-        try:
-            obj, act = parse_permission_slug(permission_slug)
-        except ValueError:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Invalid permission slug: {permission_slug}"
-            )
-        
         # Get organization domain
-        organization = await get_user_organization(current_user, db)
-        org_domain = get_organization_domain(organization)
+        org_domain = get_user_organization_domain(current_user)
         
         # Check platform roles only
         platform_roles = await get_user_platform_roles(current_user, db, enforcer, org_domain)
@@ -527,7 +662,7 @@ def is_allowed_platform(permission_slug: str):
         if not has_permission:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
-                detail=f"Permission denied: {permission_slug} required (platform-level)"
+                detail=denied_detail
             )
         return current_user
     
@@ -535,15 +670,14 @@ def is_allowed_platform(permission_slug: str):
 
 
 async def get_org_domain(
-    current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    current_user: User = Depends(get_current_user)
 ) -> str:
     """
     Dependency to get organization domain for current user.
     Use this in endpoints that need organization context for Casbin enforcement.
+    Derived from current_user.organization_id, so no database round-trip is needed.
     """
-    organization = await get_user_organization(current_user, db)
-    return get_organization_domain(organization)
+    return get_user_organization_domain(current_user)
 
 
 class OrgAwareEnforcer:
@@ -551,9 +685,19 @@ class OrgAwareEnforcer:
     Wrapper that automatically injects organization domain into enforcement checks.
     Use this as a dependency in endpoints to get automatic multi-tenant enforcement.
     """
-    def __init__(self, enforcer, org_domain: str):
+    __slots__ = ('_enforcer', '_org_domain', '_base')
+    _enforcer: Enforcer
+    _org_domain: str
+    _base: Enforcer
+    
+    def __init__(self, enforcer: Enforcer, org_domain: str):
         self._enforcer = enforcer
         self._org_domain = org_domain
+        # Unwrap MultiTenantEnforcerWrapper once instead of on every policy call
+        self._base = enforcer.enforcer if hasattr(enforcer, 'enforcer') else enforcer
+        # The wrapper from get_enforcer() is created per request, so its domain can be set up front
+        if hasattr(enforcer, 'set_org_domain'):
+            enforcer.set_org_domain(org_domain)
     
     def enforce(self, user_id: str, resource: str, action: str) -> bool:
         """3-param enforce that automatically adds org_domain"""
@@ -584,30 +728,13 @@ class OrgAwareEnforcer:
         Get roles for user within the organization domain.
         Includes both direct role assignments and roles through groups.
         """
-        # Ensure the underlying enforcer has org_domain set if it's a wrapper
-        if hasattr(self._enforcer, 'set_org_domain'):
-            self._enforcer.set_org_domain(self._org_domain)
-        
-        # Use the wrapper's get_roles_for_user which handles group inheritance
-        if hasattr(self._enforcer, 'get_roles_for_user'):
-            # Pass domain explicitly to ensure correct domain is used
-            return self._enforcer.get_roles_for_user(user_id, self._org_domain)
-        # Fallback to direct call
+        # Casbin's implicit roles handle groups; it returns de-duplicated role name strings
         try:
-            # Try implicit roles first (handles groups)
-            implicit_roles = self._enforcer.get_implicit_roles_for_user(user_id, self._org_domain)
-            # Extract role names from implicit roles
-            roles = []
-            for role_info in implicit_roles:
-                if isinstance(role_info, (list, tuple)) and len(role_info) > 0:
-                    roles.append(role_info[0])
-                else:
-                    roles.append(role_info)
-            return list(set(roles))
+            return self._base.get_implicit_roles_for_user(user_id, self._org_domain)
         except Exception:
             # Fallback to direct roles only
             try:
-                return self._enforcer.get_roles_for_user(user_id, self._org_domain)
+                return self._base.get_roles_for_user(user_id, self._org_domain)
             except Exception:
                 return []
     
@@ -617,19 +744,12 @@ class OrgAwareEnforcer:
     
     def get_all_roles(self) -> list:
         """Get all roles within the organization domain"""
-        # Access the base enforcer (unwrap if necessary)
-        base_enforcer = self._enforcer
-        if hasattr(self._enforcer, 'enforcer'):
-            base_enforcer = self._enforcer.enforcer
-        
-        # Get all grouping policies and extract unique roles for this org
-        all_grouping = base_enforcer.get_grouping_policy()
-        roles = set()
-        for policy in all_grouping:
-            # Format: [user/group, role, domain]
-            if len(policy) >= 3 and policy[2] == self._org_domain:
-                roles.add(policy[1])  # role is at index 1
-        return list(roles)
+        # CachedEnforcer keeps a per-domain role index
+        if hasattr(self._base, 'get_roles_in_domain'):
+            return self._base.get_roles_in_domain(self._org_domain)
+        # Let Casbin filter on the domain column (index 2) instead of scanning every tenant's policies
+        # Format: [user/group, role, domain]
+        return list({policy[1] for policy in self._base.get_filtered_grouping_policy(2, self._org_domain)})
     
     def get_permissions_for_user(self, user_id: str) -> list:
         """Get permissions for user within the organization domain"""
@@ -649,32 +769,15 @@ class OrgAwareEnforcer:
     
     def delete_user(self, user_id: str) -> bool:
         """Delete all policies and grouping policies for a user within the organization domain"""
-        result = False
-        
         try:
-            # Access the base enforcer (unwrap if necessary)
-            base_enforcer = self._enforcer
-            if hasattr(self._enforcer, 'enforcer'):
-                base_enforcer = self._enforcer.enforcer
+            base_enforcer = self._base
             
-            # Delete all role assignments (grouping policies) for the user in this organization
-            # Get all grouping policies for this user
-            grouping_policies = base_enforcer.get_filtered_grouping_policy(0, user_id)
-            for policy in grouping_policies:
-                # Only delete if it's in this organization domain
-                if len(policy) >= 3 and policy[2] == self._org_domain:
-                    base_enforcer.remove_grouping_policy(*policy)
-                    result = True
+            # Delete all role assignments (grouping policies) for the user in this organization.
+            # Filtered removal is a single DELETE in the adapter; "" matches any role.
+            base_enforcer.remove_filtered_grouping_policy(0, user_id, "", self._org_domain)
             
             # Delete all direct permissions (policies) for the user in this organization
-            policies = base_enforcer.get_filtered_policy(0, user_id, self._org_domain)
-            for policy in policies:
-                base_enforcer.remove_policy(*policy)
-                result = True
-            
-            # Save the policy changes
-            if result:
-                base_enforcer.save_policy()
+            base_enforcer.remove_filtered_policy(0, user_id, self._org_domain)
         except Exception as e:
             # Log the error but don't fail the deletion
             import logging
@@ -693,51 +796,27 @@ class OrgAwareEnforcer:
     
     def get_policy(self) -> list:
         """Get all policies"""
-        # Access the base enforcer (unwrap if necessary)
-        base_enforcer = self._enforcer
-        if hasattr(self._enforcer, 'enforcer'):
-            base_enforcer = self._enforcer.enforcer
-        return base_enforcer.get_policy()
+        return self._base.get_policy()
     
     def get_filtered_policy(self, field_index: int, *field_values) -> list:
         """Get filtered policies"""
-        # Access the base enforcer (unwrap if necessary)
-        base_enforcer = self._enforcer
-        if hasattr(self._enforcer, 'enforcer'):
-            base_enforcer = self._enforcer.enforcer
-        return base_enforcer.get_filtered_policy(field_index, *field_values)
+        return self._base.get_filtered_policy(field_index, *field_values)
     
     def get_grouping_policy(self) -> list:
         """Get all grouping policies"""
-        # Access the base enforcer (unwrap if necessary)
-        base_enforcer = self._enforcer
-        if hasattr(self._enforcer, 'enforcer'):
-            base_enforcer = self._enforcer.enforcer
-        return base_enforcer.get_grouping_policy()
+        return self._base.get_grouping_policy()
     
     def get_filtered_grouping_policy(self, field_index: int, *field_values) -> list:
         """Get filtered grouping policies"""
-        # Access the base enforcer (unwrap if necessary)
-        base_enforcer = self._enforcer
-        if hasattr(self._enforcer, 'enforcer'):
-            base_enforcer = self._enforcer.enforcer
-        return base_enforcer.get_filtered_grouping_policy(field_index, *field_values)
+        return self._base.get_filtered_grouping_policy(field_index, *field_values)
     
     def remove_filtered_policy(self, field_index: int, *field_values) -> bool:
         """Remove filtered policies"""
-        # Access the base enforcer (unwrap if necessary)
-        base_enforcer = self._enforcer
-        if hasattr(self._enforcer, 'enforcer'):
-            base_enforcer = self._enforcer.enforcer
-        return base_enforcer.remove_filtered_policy(field_index, *field_values)
+        return self._base.remove_filtered_policy(field_index, *field_values)
     
     def remove_filtered_grouping_policy(self, field_index: int, *field_values) -> bool:
         """Remove filtered grouping policies"""
-        # Access the base enforcer (unwrap if necessary)
-        base_enforcer = self._enforcer
-        if hasattr(self._enforcer, 'enforcer'):
-            base_enforcer = self._enforcer.enforcer
-        return base_enforcer.remove_filtered_grouping_policy(field_index, *field_values)
+        return self._base.remove_filtered_grouping_policy(field_index, *field_values)
     
     def load_policy(self):
         """Delegate to underlying enforcer"""
@@ -749,8 +828,7 @@ class OrgAwareEnforcer:
 
 
 async def get_org_aware_enforcer(
-    current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    current_user: User = Depends(get_current_user)
 ) -> OrgAwareEnforcer:
     """
     Get an organization-aware enforcer that automatically injects org_domain.
@@ -761,13 +839,44 @@ async def get_org_aware_enforcer(
     - etc.
     
     Use this dependency in new endpoints or replace Depends(get_enforcer) with this.
+    FastAPI caches it per request, so every Depends(get_org_aware_enforcer) shares one wrapper.
     """
-    from app.core.casbin import get_enforcer
     base_enforcer = get_enforcer()
-    org_domain = await get_org_domain(current_user, db)
+    org_domain = get_user_organization_domain(current_user)
     return OrgAwareEnforcer(base_enforcer, org_domain)
 
 
+async def get_is_plugin_admin(
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+    enforcer: OrgAwareEnforcer = Depends(get_org_aware_enforcer)
+) -> bool:
+    """
+    Whether the user can see every plugin: platform admins and users with platform:plugins:upload.
+
+    The upload permission is only evaluated when the user is not already a platform admin.
+    """
+    from app.core.authorization import check_platform_permission
+
+    return (
+        await is_platform_admin(current_user, db, enforcer)
+        or await check_platform_permission(current_user, "platform:plugins:upload", db, enforcer)
+    )
+
+
+# Longest form uuid.UUID accepts: "urn:uuid:" + 36 characters
+_MAX_UUID_TEXT_LENGTH = 45
+
+
+@lru_cache(maxsize=2048)
+def _parse_business_unit_id(value: str) -> Optional[uuid.UUID]:
+    """Parse a business unit ID, memoized since clients resend the same few IDs on every request"""
+    try:
+        return uuid.UUID(value)
+    except ValueError:
+        return None
+
+
 async def get_active_business_unit(
     request: Request,
     current_user: User = Depends(get_current_user),
@@ -782,35 +891,26 @@ async def get_active_business_unit(
     - Header: X-Business-Unit-Id
     - Query param: business_unit_id
     """
-    from app.models.business_unit import BusinessUnitMember
-    
     # Try header first, then query param
     business_unit_id_str = request.headers.get("X-Business-Unit-Id") or request.query_params.get("business_unit_id")
     
     if not business_unit_id_str:
         return None
     
-    try:
-        business_unit_uuid = uuid.UUID(business_unit_id_str)
-    except (ValueError, TypeError):
+    # Reject oversized values before they reach (and evict entries from) the parse cache
+    if len(business_unit_id_str) > _MAX_UUID_TEXT_LENGTH:
+        return None
+    business_unit_uuid = _parse_business_unit_id(business_unit_id_str)
+    if business_unit_uuid is None:
         return None
     
+    from app.core.authorization import has_bu_access
+    
     # Validate user has access to this business unit
-    result = await db.execute(
-        select(BusinessUnitMember).where(
-            BusinessUnitMember.business_unit_id == business_unit_uuid,
-            BusinessUnitMember.user_id == current_user.id
-        )
-    )
-    membership = result.scalar_one_or_none()
-    
-    if not membership:
-        # Check if user is super admin (they can access all business units)
-        from app.core.casbin import get_enforcer
-        enforcer = get_enforcer()
-        org_domain = await get_org_domain(current_user, db)
-        is_admin = await is_platform_admin(current_user, db, enforcer)
-        if is_admin:
+    if not await has_bu_access(current_user.id, business_unit_uuid, db):
+        # Check if user is super admin (they can access all business units).
+        # Answered from the in-memory Casbin model, so no wrapper is needed.
+        if await is_platform_admin(current_user, db, get_base_enforcer()):
             return business_unit_uuid
         return None
     
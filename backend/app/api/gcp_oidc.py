@@ -1,74 +1,110 @@
 from fastapi import APIRouter, Depends, HTTPException
 from typing import Dict, Any, List
-import httpx
-from app.api.deps import get_current_user
+import asyncio
+from app.api.deps import cloud_rate_limit
 from app.models.rbac import User
 from app.services.cloud_integrations import CloudIntegrationService
 from app.config import settings
+from app.core.http_client import get_http_client
 
 router = APIRouter()
 
 @router.post("/cloud/gcp/run-test")
 async def gcp_run_test(
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(cloud_rate_limit)
 ):
     """
     Test GCP integration.
     Checks if we can access the project info.
     """
     token_data = await CloudIntegrationService.get_gcp_access_token(
-        user_id=str(current_user.id),
+        user_id=current_user.id_str,
         service_account_email=current_user.gcp_service_account
     )
     access_token = token_data['access_token']
     
-    async with httpx.AsyncClient() as client:
-        # Get Project Info
-        resp = await client.get(
-            f"https://cloudresourcemanager.googleapis.com/v1/projects/{settings.GCP_PROJECT_ID}",
-            headers={"Authorization": f"Bearer {access_token}"}
-        )
+    client = get_http_client()
+    # Get Project Info
+    resp = await client.get(
+        f"https://cloudresourcemanager.googleapis.com/v1/projects/{settings.GCP_PROJECT_ID}",
+        headers={"Authorization": f"Bearer {access_token}"}
+    )
+    
+    if resp.status_code != 200:
+        raise HTTPException(status_code=resp.status_code, detail=resp.text)
         
-        if resp.status_code != 200:
-            raise HTTPException(status_code=resp.status_code, detail=resp.text)
-            
-        return resp.json()
+    return resp.json()
 
 @router.post("/cloud/gcp/projects/list")
 async def list_gcp_projects(
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(cloud_rate_limit)
 ):
     """List accessible GCP projects"""
     token_data = await CloudIntegrationService.get_gcp_access_token(
-        user_id=str(current_user.id),
+        user_id=current_user.id_str,
         service_account_email=current_user.gcp_service_account
     )
     access_token = token_data['access_token']
     
-    async with httpx.AsyncClient() as client:
-        resp = await client.get(
-            "https://cloudresourcemanager.googleapis.com/v1/projects",
-            headers={"Authorization": f"Bearer {access_token}"}
-        )
-        return resp.json()
+    client = get_http_client()
+    resp = await client.get(
+        "https://cloudresourcemanager.googleapis.com/v1/projects",
+        headers={"Authorization": f"Bearer {access_token}"}
+    )
+    return resp.json()
 
 @router.post("/cloud/gcp/compute/list")
 async def list_gcp_compute(
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(cloud_rate_limit)
 ):
     """List Compute Engine instances in default zone"""
     token_data = await CloudIntegrationService.get_gcp_access_token(
-        user_id=str(current_user.id),
+        user_id=current_user.id_str,
         service_account_email=current_user.gcp_service_account
     )
     access_token = token_data['access_token']
     
     zone = "us-central1-a" # Default for example
     
-    async with httpx.AsyncClient() as client:
-        url = f"https://compute.googleapis.com/compute/v1/projects/{settings.GCP_PROJECT_ID}/zones/{zone}/instances"
-        resp = await client.get(
-            url,
-            headers={"Authorization": f"Bearer {access_token}"}
+    client = get_http_client()
+    url = f"https://compute.googleapis.com/compute/v1/projects/{settings.GCP_PROJECT_ID}/zones/{zone}/instances"
+    resp = await client.get(
+        url,
+        headers={"Authorization": f"Bearer {access_token}"}
+    )
+    return resp.json()
+
+@router.post("/cloud/gcp/run-full-test")
+async def gcp_run_full_test(
+    current_user: User = Depends(cloud_rate_limit)
+):
+    """
+    Run the project, project list and compute checks in one call.
+    The access token is fetched once and the three GCP requests run concurrently.
+    """
+    token_data = await CloudIntegrationService.get_gcp_access_token(
+        user_id=current_user.id_str,
+        service_account_email=current_user.gcp_service_account
+    )
+    headers = {"Authorization": f"Bearer {token_data['access_token']}"}
+    
+    zone = "us-central1-a" # Default for example
+    
+    client = get_http_client()
+    project_resp, projects_resp, compute_resp = await asyncio.gather(
+        client.get(f"https://cloudresourcemanager.googleapis.com/v1/projects/{settings.GCP_PROJECT_ID}", headers=headers),
+        client.get("https://cloudresourcemanager.googleapis.com/v1/projects", headers=headers),
+        client.get(
+            f"https://compute.googleapis.com/compute/v1/projects/{settings.GCP_PROJECT_ID}/zones/{zone}/instances",
+            headers=headers
         )
-        return resp.json()
+    )
+    
+    if project_resp.status_code != 200:
+        raise HTTPException(status_code=project_resp.status_code, detail=project_resp.text)
+    
+    return {
+        "project": project_resp.json(),
+        "projects": projects_resp.json(),
+        "compute": compute_resp.json()
+    }
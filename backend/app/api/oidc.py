@@ -1,5 +1,4 @@
-from fastapi import APIRouter
-from app.config import settings
+from fastapi import APIRouter, Response
 from app.core.oidc import oidc_provider
 
 router = APIRouter()
@@ -11,15 +10,7 @@ def get_openid_configuration():
     Cloud providers use this to verify the issuer and find the JWKS URI.
     Accessible at: /.well-known/openid-configuration
     """
-    return {
-        "issuer": settings.OIDC_ISSUER,
-        "jwks_uri": f"{settings.OIDC_ISSUER}/.well-known/jwks.json",
-        "response_types_supported": ["id_token"],
-        "subject_types_supported": ["public"],
-        "id_token_signing_alg_values_supported": ["RS256"],
-        "token_endpoint": f"{settings.OIDC_ISSUER}/oidc/token",
-        "claims_supported": ["sub", "iss", "aud", "exp", "iat", "jti"]
-    }
+    return Response(content=oidc_provider.get_openid_configuration_json(), media_type="application/json")
 
 @router.get("/jwks.json")
 def get_jwks():
@@ -28,7 +19,7 @@ def get_jwks():
     Returns public keys used to verify OIDC tokens.
     Accessible at: /.well-known/jwks.json
     """
-    return oidc_provider.get_jwks()
+    return Response(content=oidc_provider.get_jwks_json(), media_type="application/json")
 
 @router.post("/oidc/token")
 def issue_token(subject: str = "test-user"):
@@ -12,30 +12,47 @@ from pathlib import Path
 from app.database import get_db
 from app.models import Plugin, PluginVersion, User, Job, JobLog, PluginAccessRequest, AccessRequestStatus
 from app.schemas.plugins import PluginResponse
-from app.api.deps import get_current_user, OrgAwareEnforcer, get_org_aware_enforcer, is_platform_admin, get_active_business_unit
+from app.core.versions import version_key
+from app.api.deps import get_current_user, OrgAwareEnforcer, get_org_aware_enforcer, get_is_plugin_admin, get_active_business_unit
 from app.logger import logger
 from app.config import settings
 
 router = APIRouter()
 
+
+def _latest_version(versions: List[PluginVersion]) -> Optional[PluginVersion]:
+    """Get the highest version of a plugin, or None if it has no versions"""
+    return max(versions, key=lambda v: version_key(v.version), default=None)
+
 @router.get("/", response_model=List[PluginResponse])
 async def list_plugins(
     request: Request,
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
-    enforcer: OrgAwareEnforcer = Depends(get_org_aware_enforcer)
+    is_admin: bool = Depends(get_is_plugin_admin)
 ):
     """List all available plugins"""
-    result = await db.execute(
-        select(Plugin).options(selectinload(Plugin.versions))
-    )
+    result = await db.execute(select(Plugin))
     plugins = result.scalars().all()
     
-    # Check if user is platform admin or has plugins:upload permission
-    user_id = str(current_user.id)
-    from app.core.authorization import check_platform_permission
-    has_upload_permission = await check_platform_permission(current_user, "platform:plugins:upload", db, enforcer.enforcer if hasattr(enforcer, 'enforcer') else enforcer)
-    is_admin = await is_platform_admin(current_user, db, enforcer) or has_upload_permission
+    # Every version's name is listed, but only the latest version's row (manifest, GitOps info) is used:
+    # pick the latest from the names, then load just those rows
+    version_result = await db.execute(
+        select(PluginVersion.id, PluginVersion.plugin_id, PluginVersion.version).order_by(PluginVersion.id)
+    )
+    version_names = {}
+    latest_version_ids = {}
+    for version_id, version_plugin_id, version_name in version_result.all():
+        version_names.setdefault(version_plugin_id, []).append(version_name)
+        latest = latest_version_ids.get(version_plugin_id)
+        if latest is None or version_key(version_name) > version_key(latest[1]):
+            latest_version_ids[version_plugin_id] = (version_id, version_name)
+    latest_versions = {}
+    if latest_version_ids:
+        latest_result = await db.execute(
+            select(PluginVersion).where(PluginVersion.id.in_([version_id for version_id, _ in latest_version_ids.values()]))
+        )
+        latest_versions = {v.plugin_id: v for v in latest_result.scalars().all()}
     
     # Get active business unit ID from user's active_business_unit_id
     business_unit_id = None
@@ -45,38 +62,41 @@ async def list_plugins(
     # Check which plugins the user has access to in the current business unit (only needed for non-admins)
     # Only APPROVED requests grant access (REVOKED means access was removed)
     user_access = set()
-    if not is_admin:
+    pending_requests = set()
+    # Access only matters for locked plugins, so restrict the lookups to those
+    locked_plugin_ids = [plugin.id for plugin in plugins if plugin.is_locked]
+    if not is_admin and locked_plugin_ids:
         from app.models.plugins import PluginAccess
         # First check PluginAccess (granted access) for current business unit
         access_result = await db.execute(
-            select(PluginAccess).where(
+            select(PluginAccess.plugin_id).where(
                 PluginAccess.user_id == current_user.id,
-                PluginAccess.business_unit_id == business_unit_id
+                PluginAccess.business_unit_id == business_unit_id,
+                PluginAccess.plugin_id.in_(locked_plugin_ids)
             )
         )
-        user_access = {access.plugin_id for access in access_result.scalars().all()}
+        user_access = set(access_result.scalars().all())
         
-        # Also check approved access requests for current business unit
+        # Approved and pending access requests for current business unit, in one query
         access_request_result = await db.execute(
-            select(PluginAccessRequest).where(
+            select(PluginAccessRequest.plugin_id, PluginAccessRequest.status).where(
                 PluginAccessRequest.user_id == current_user.id,
                 PluginAccessRequest.business_unit_id == business_unit_id,
-                PluginAccessRequest.status == AccessRequestStatus.APPROVED
+                PluginAccessRequest.plugin_id.in_(locked_plugin_ids),
+                PluginAccessRequest.status.in_([AccessRequestStatus.APPROVED, AccessRequestStatus.PENDING])
             )
         )
-        user_access.update({req.plugin_id for req in access_request_result.scalars().all()})
+        for plugin_id, request_status in access_request_result.all():
+            if request_status == AccessRequestStatus.APPROVED:
+                user_access.add(plugin_id)
+            else:
+                pending_requests.add(plugin_id)
     
-    # Check pending requests for non-admins in current business unit
-    pending_requests = set()
-    if not is_admin:
-        pending_result = await db.execute(
-            select(PluginAccessRequest).where(
-                PluginAccessRequest.user_id == current_user.id,
-                PluginAccessRequest.business_unit_id == business_unit_id,
-                PluginAccessRequest.status == AccessRequestStatus.PENDING
-            )
-        )
-        pending_requests = {req.plugin_id for req in pending_result.scalars().all()}
+    # Construct base URL from request
+    if request.url.port:
+        base_url_full = f"{request.url.scheme}://{request.url.hostname}:{request.url.port}"
+    else:
+        base_url_full = f"{request.url.scheme}://{request.url.hostname}"
     
     response = []
     for plugin in plugins:
@@ -105,21 +125,13 @@ async def list_plugins(
             created_at=plugin.created_at,
             updated_at=plugin.updated_at,
             latest_version="0.0.0",
-            versions=[v.version for v in plugin.versions],
+            versions=version_names.get(plugin.id, []),
             git_repo_url=None,  # Will be set below for admins
             git_branch=None  # Will be set below for admins
         )
         
         # Get latest version info
-        latest_version = None
-        if plugin.versions:
-            # Sort versions
-            sorted_versions = sorted(
-                plugin.versions, 
-                key=lambda v: v.version, 
-                reverse=True
-            )
-            latest_version = sorted_versions[0]
+        latest_version = latest_versions.get(plugin.id)
         
         if latest_version and latest_version.manifest:
             manifest = latest_version.manifest
@@ -132,43 +144,12 @@ async def list_plugins(
                 plugin_data.git_repo_url = latest_version.git_repo_url
                 plugin_data.git_branch = latest_version.git_branch
             
-            # Handle Icon URL
+            # Handle Icon URL (location resolved at upload time, see upload_plugin and
+            # backfill_plugin_icon_paths); default to the flattened layout if it's missing
             icon_path = manifest.get('icon')
             if icon_path:
-                # Use Path for reliable file checking
-                storage_root = Path("storage")
-                version_path = storage_root / "plugins" / plugin.id / latest_version.version
-                
-                # Check multiple possible locations (after flattening, files should be in extracted/)
-                extracted_path = version_path / "extracted"
-                nested_icon_path = extracted_path / plugin.id / icon_path  # Old nested structure
-                direct_icon_path = extracted_path / icon_path  # Flattened structure
-                legacy_nested = version_path / plugin.id / icon_path  # Legacy nested
-                legacy_direct = version_path / icon_path  # Legacy direct
-                
-                base_url = f"/storage/plugins/{plugin.id}/{latest_version.version}"
-                
-                # Construct base URL from request
-                base_url_scheme = request.url.scheme
-                base_url_host = request.url.hostname
-                base_url_port = request.url.port
-                if base_url_port:
-                    base_url_full = f"{base_url_scheme}://{base_url_host}:{base_url_port}"
-                else:
-                    base_url_full = f"{base_url_scheme}://{base_url_host}"
-                
-                # Check in order of preference
-                if direct_icon_path.exists():
-                    plugin_data.icon = f"{base_url_full}{base_url}/extracted/{icon_path}"
-                elif nested_icon_path.exists():
-                    plugin_data.icon = f"{base_url_full}{base_url}/extracted/{plugin.id}/{icon_path}"
-                elif legacy_direct.exists():
-                    plugin_data.icon = f"{base_url_full}{base_url}/{icon_path}"
-                elif legacy_nested.exists():
-                    plugin_data.icon = f"{base_url_full}{base_url}/{plugin.id}/{icon_path}"
-                else:
-                    # Fallback to most likely path (flattened structure)
-                    plugin_data.icon = f"{base_url_full}{base_url}/extracted/{icon_path}"
+                icon_url_path = manifest.get('_icon_url_path') or f"extracted/{icon_path}"
+                plugin_data.icon = f"{base_url_full}/storage/plugins/{plugin.id}/{latest_version.version}/{icon_url_path}"
             
         response.append(plugin_data)
         
@@ -179,7 +160,7 @@ async def get_plugin(
     plugin_id: str,
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
-    enforcer: OrgAwareEnforcer = Depends(get_org_aware_enforcer),
+    is_admin: bool = Depends(get_is_plugin_admin),
     business_unit_id: Optional[uuid.UUID] = Depends(get_active_business_unit)
 ):
     """Get plugin details"""
@@ -195,12 +176,6 @@ async def get_plugin(
     if not plugin:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Plugin not found")
     
-    # Check if user is platform admin or has plugins:upload permission
-    user_id = str(current_user.id)
-    from app.core.authorization import check_platform_permission
-    has_upload_permission = await check_platform_permission(current_user, "platform:plugins:upload", db, enforcer.enforcer if hasattr(enforcer, 'enforcer') else enforcer)
-    is_admin = await is_platform_admin(current_user, db, enforcer) or has_upload_permission
-    
     # Get active business unit ID (use dependency value or fallback to user's active_business_unit_id)
     if not business_unit_id and current_user.active_business_unit_id:
         business_unit_id = current_user.active_business_unit_id
@@ -251,12 +226,8 @@ async def get_plugin(
         has_pending_request = pending_result.scalar_one_or_none() is not None
     
     # Get latest version
-    latest_version_str = "0.0.0"
-    latest_version_obj = None
-    if plugin.versions:
-        sorted_versions = sorted(plugin.versions, key=lambda v: v.version, reverse=True)
-        latest_version_obj = sorted_versions[0]
-        latest_version_str = latest_version_obj.version
+    latest_version_obj = _latest_version(plugin.versions)
+    latest_version_str = latest_version_obj.version if latest_version_obj else "0.0.0"
     
     # Get manifest info for category and cloud_provider
     category = "service"
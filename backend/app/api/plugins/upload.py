@@ -1,13 +1,12 @@
 """Plugin upload endpoints"""
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, status, Request
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, UploadFile, File, Form, status, Request
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, update
 from typing import Optional
-import tempfile
-import shutil
 import zipfile
 import re
-from pathlib import Path
+from pathlib import Path, PurePosixPath
 
 from app.database import get_db
 from app.models import Plugin, PluginVersion, User
@@ -20,8 +19,67 @@ from app.config import settings
 
 router = APIRouter()
 
+
+def _plugin_branch_name(manifest: dict, plugin_id: str, version: str) -> str:
+    """
+    Template branch for an uploaded plugin version.
+    One branch per version, so concurrent uploads of a plugin never push to the same branch.
+    """
+    # Prefer a human-readable name from the manifest, fall back to plugin_id
+    raw_name = (manifest or {}).get('name') or plugin_id
+    # Normalize: lowercase, replace spaces/underscores with hyphens
+    base_name = raw_name.lower().replace(" ", "-").replace("_", "-")
+    # Remove invalid characters for Git branch names
+    base_name = re.sub(r'[^a-z0-9\-]', '-', base_name)
+    base_name = re.sub(r'-+', '-', base_name).strip('-')
+    if not base_name:
+        base_name = plugin_id.lower()
+    version_name = re.sub(r'[^A-Za-z0-9.\-]', '-', version).strip('.-') or "0"
+    return f"plugin-{base_name}-v{version_name}"
+
+
+async def _push_plugin_to_git(
+    plugin_version_id,
+    repo_url: str,
+    branch: str,
+    source_dir: Path,
+    commit_message: str
+) -> bool:
+    """
+    Background task: push an uploaded plugin's extracted files to its GitHub branch.
+    
+    Runs after the upload response is sent; the clone/commit/push runs in the threadpool.
+    The version is stored without GitOps fields and only gets them once the push succeeded,
+    so deployments use plugin.zip until the branch exists (and for good if the push fails).
+    """
+    from app.services.git_service import git_service
+    from app.database import AsyncSessionLocal
+    
+    try:
+        await run_in_threadpool(
+            git_service.initialize_and_push_plugin,
+            repo_url=repo_url,
+            branch=branch,
+            source_dir=source_dir,
+            commit_message=commit_message
+        )
+    except Exception as e:
+        logger.error(f"Failed to push plugin to GitHub, version {plugin_version_id} will deploy from its ZIP: {e}", exc_info=True)
+        return False
+    
+    logger.info(f"Successfully pushed plugin to GitHub branch {branch}")
+    async with AsyncSessionLocal() as db:
+        await db.execute(
+            update(PluginVersion)
+            .where(PluginVersion.id == plugin_version_id)
+            .values(git_repo_url=repo_url, git_branch=branch)
+        )
+        await db.commit()
+    return True
+
 @router.post("/upload", response_model=PluginVersionResponse, status_code=status.HTTP_201_CREATED)
 async def upload_plugin(
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     git_repo_url: Optional[str] = Form(None),
     git_branch: Optional[str] = Form(None),
@@ -53,7 +111,6 @@ async def upload_plugin(
         )
     
     # Initialize variables
-    tmp_path = None
     manifest = None
     plugin_id = None
     version = None
@@ -66,16 +123,11 @@ async def upload_plugin(
             detail="Only ZIP files are accepted"
         )
     
-    # Save to temporary file for validation
-    with tempfile.NamedTemporaryFile(delete=False, suffix='.zip') as tmp_file:
-        shutil.copyfileobj(file.file, tmp_file)
-        tmp_path = Path(tmp_file.name)
-    
-    logger.info(f"Temporary file created: {tmp_path}, size: {tmp_path.stat().st_size} bytes")
-    
-    # Validate plugin ZIP
-    logger.info(f"Starting plugin validation for {file.filename}")
-    is_valid, error_msg, manifest = plugin_validator.validate_zip(tmp_path)
+    # Validate the upload in place: it is already spooled (in memory, or on disk once large),
+    # so there is no need to write it to another temporary file first
+    logger.info(f"Starting plugin validation for {file.filename}, size: {file.size} bytes")
+    file.file.seek(0)
+    is_valid, error_msg, manifest = plugin_validator.validate_zip(file.file)
     
     if not is_valid:
         logger.error(f"Plugin validation failed: {error_msg}")
@@ -135,110 +187,100 @@ async def upload_plugin(
         else:
             logger.debug("GitOps disabled: GITHUB_REPOSITORY not configured")
         
-        # If file is uploaded, extract and push to GitHub
-        storage_path = ""
+        # Extract the uploaded file and push to GitHub
         final_git_branch = git_branch
         
-        if tmp_path is not None and tmp_path.exists():
-            # Save to storage for backward compatibility
-            with open(tmp_path, 'rb') as f:
-                storage_path = storage_service.save_plugin(plugin_id, version, f)
-            
-            # Extract the zip file - flatten structure if ZIP contains a single root directory
-            extract_dir = Path(storage_path).parent / "extracted"
-            extract_dir.mkdir(parents=True, exist_ok=True)
-            
-            # First extract to a temp location to check structure
-            temp_extract = Path(storage_path).parent / "temp_extract"
-            temp_extract.mkdir(parents=True, exist_ok=True)
-            
-            with zipfile.ZipFile(tmp_path, 'r') as zip_ref:
-                members = [m for m in zip_ref.infolist() if not (m.filename.startswith('__MACOSX') or m.filename.endswith('.DS_Store'))]
-                zip_ref.extractall(temp_extract, members)
+        # Save to storage for backward compatibility
+        file.file.seek(0)
+        storage_path = storage_service.save_plugin(plugin_id, version, file.file)
+        
+        # Extract the zip file - flatten structure if ZIP contains a single root directory
+        extract_dir = Path(storage_path).parent / "extracted"
+        
+        with zipfile.ZipFile(storage_path, 'r') as zip_ref:
+            members = [m for m in zip_ref.infolist() if not (m.filename.startswith('__MACOSX') or m.filename.endswith('.DS_Store'))]
             
-            # Check if there's a single root directory
-            root_items = list(temp_extract.iterdir())
-            if len(root_items) == 1 and root_items[0].is_dir() and root_items[0].name == plugin_id:
+            # Decide on the layout from the central directory, then extract once
+            root_prefix = f"{plugin_id}/"
+            if members and all(m.filename.startswith(root_prefix) for m in members):
                 # ZIP has a single root directory matching plugin_id - flatten it
-                logger.info(f"Flattening ZIP structure: moving files from {root_items[0].name}/ to root")
-                for item in root_items[0].iterdir():
-                    dest = extract_dir / item.name
-                    if item.is_dir():
-                        shutil.copytree(item, dest, dirs_exist_ok=True)
-                    else:
-                        shutil.copy2(item, dest)
-                shutil.rmtree(temp_extract, ignore_errors=True)
-            else:
-                # No single root directory - copy all items as-is
-                for item in root_items:
-                    dest = extract_dir / item.name
-                    if item.is_dir():
-                        shutil.copytree(item, dest, dirs_exist_ok=True)
-                    else:
-                        shutil.copy2(item, dest)
-                shutil.rmtree(temp_extract, ignore_errors=True)
+                logger.info(f"Flattening ZIP structure: moving files from {plugin_id}/ to root")
+                for member in members:
+                    # Renaming only changes where the member is written; reads use orig_filename
+                    member.filename = member.filename[len(root_prefix):]
+                members = [m for m in members if m.filename]
             
-            logger.info(f"Plugin extracted to: {extract_dir}")
+            if not final_git_repo_url:
+                # The full tree is only needed as the source of the Git push; deployments read
+                # plugin.zip directly, so without GitOps only the icon has to be on disk
+                icon_path = manifest.get('icon')
+                icon_names = {str(PurePosixPath(icon_path)), f"{plugin_id}/{PurePosixPath(icon_path)}"} if icon_path else set()
+                members = [m for m in members if m.filename in icon_names]
             
-            # If GitOps is enabled, push to GitHub
-            if final_git_repo_url:
-                try:
-                    from app.services.git_service import git_service
-                    
-                    # Create template branch name from plugin identifier
-                    if not final_git_branch:
-                        # Prefer a human-readable name from the manifest, fall back to plugin_id
-                        raw_name = (manifest or {}).get('name') or plugin_id
-                        # Normalize: lowercase, replace spaces/underscores with hyphens
-                        base_name = raw_name.lower().replace(" ", "-").replace("_", "-")
-                        # Remove invalid characters for Git branch names
-                        base_name = re.sub(r'[^a-z0-9\-]', '-', base_name)
-                        base_name = re.sub(r'-+', '-', base_name).strip('-')
-                        if not base_name:
-                            base_name = plugin_id.lower()
-                        branch_name = f"plugin-{base_name}"
-                        final_git_branch = branch_name
-                    
-                    logger.info(f"Pushing plugin to GitHub: {final_git_repo_url} branch {final_git_branch}")
-                    
-                    # Push extracted files to GitHub branch
-                    git_service.initialize_and_push_plugin(
-                        repo_url=final_git_repo_url,
-                        branch=final_git_branch,
-                        source_dir=extract_dir,
-                        commit_message=f"Upload plugin {plugin_id} version {version}"
-                    )
-                    
-                    logger.info(f"Successfully pushed plugin to GitHub branch {final_git_branch}")
-                    
-                except Exception as e:
-                    logger.error(f"Failed to push plugin to GitHub: {e}", exc_info=True)
-                    # Continue without GitOps if push fails (backward compatibility)
-                    if not git_repo_url:
-                        # If GitOps was optional, continue
-                        final_git_repo_url = None
-                        final_git_branch = None
-                    else:
-                        # If GitOps was required, raise error
-                        raise HTTPException(
-                            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                            detail=f"Failed to push plugin to GitHub: {str(e)}"
-                        )
+            if members:
+                extract_dir.mkdir(parents=True, exist_ok=True)
+                zip_ref.extractall(extract_dir, members)
         
-        # Create plugin version record
+        logger.info(f"Extracted {len(members)} plugin file(s) to: {extract_dir}")
+        
+        # Record where the icon landed so listing plugins doesn't have to probe the filesystem
+        if manifest.get('icon'):
+            manifest['_icon_url_path'] = storage_service.resolve_icon_path(plugin_id, version, manifest['icon'])
+        
+        if final_git_repo_url and not final_git_branch:
+            final_git_branch = _plugin_branch_name(manifest, plugin_id, version)
+        commit_message = f"Upload plugin {plugin_id} version {version}"
+        
+        # Create plugin version record; GitOps fields are only set once the branch has been pushed
         plugin_version = PluginVersion(
             plugin_id=plugin_id,
             version=version,
             manifest=manifest if manifest else {},
-            storage_path=storage_path if file else "",
-            git_repo_url=final_git_repo_url,
-            git_branch=final_git_branch
+            storage_path=storage_path,
+            git_repo_url=None,
+            git_branch=None
         )
+        
+        if git_repo_url:
+            # The caller asked for this repository: push before responding and fail the upload if it fails
+            from app.services.git_service import git_service
+            
+            logger.info(f"Pushing plugin to GitHub: {final_git_repo_url} branch {final_git_branch}")
+            try:
+                await run_in_threadpool(
+                    git_service.initialize_and_push_plugin,
+                    repo_url=final_git_repo_url,
+                    branch=final_git_branch,
+                    source_dir=extract_dir,
+                    commit_message=commit_message
+                )
+            except Exception as e:
+                logger.error(f"Failed to push plugin to GitHub: {e}", exc_info=True)
+                raise HTTPException(
+                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                    detail=f"Failed to push plugin to GitHub: {str(e)}"
+                )
+            logger.info(f"Successfully pushed plugin to GitHub branch {final_git_branch}")
+            plugin_version.git_repo_url = final_git_repo_url
+            plugin_version.git_branch = final_git_branch
+        
         db.add(plugin_version)
         
         await db.commit()
         await db.refresh(plugin_version)
         
+        if final_git_repo_url and not git_repo_url:
+            # Repository from configuration: GitOps is optional, push after the response is sent
+            logger.info(f"Queued push of plugin {plugin_id} v{version} to GitHub: {final_git_repo_url} branch {final_git_branch}")
+            background_tasks.add_task(
+                _push_plugin_to_git,
+                plugin_version.id,
+                final_git_repo_url,
+                final_git_branch,
+                extract_dir,
+                commit_message
+            )
+        
         return plugin_version
     
     except HTTPException:
@@ -249,10 +291,6 @@ async def upload_plugin(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to upload plugin: {str(e)}"
         )
-    finally:
-        # Clean up temp file
-        if tmp_path is not None and tmp_path.exists():
-            tmp_path.unlink(missing_ok=True)
 
 @router.post("/upload-template", response_model=PluginVersionResponse, status_code=status.HTTP_201_CREATED)
 async def upload_microservice_template(
@@ -20,7 +20,7 @@ from app.schemas.plugins import (
 from fastapi import Request
 from typing import Optional
 import uuid
-from app.api.deps import get_current_user, is_allowed, is_allowed_bu, get_current_active_superuser, get_active_business_unit, is_platform_admin
+from app.api.deps import get_current_user, is_allowed, is_allowed_bu, get_current_active_superuser, get_active_business_unit, is_platform_admin, get_org_aware_enforcer, OrgAwareEnforcer
 
 router = APIRouter(prefix="/provision", tags=["Provisioning"])
 
@@ -30,19 +30,17 @@ async def provision(
     current_user: User = Depends(is_allowed_bu("business_unit:plugins:provision")),
     db: AsyncSession = Depends(get_db),
     business_unit_id: Optional[uuid.UUID] = Depends(get_active_business_unit),
+    enforcer_instance: OrgAwareEnforcer = Depends(get_org_aware_enforcer),
 ):
     """
     Trigger a provisioning job
     Returns immediately with job ID for async execution
     Requires: plugins:provision permission + environment-specific permission
     """
-    from app.api.deps import get_org_aware_enforcer
     from app.logger import logger
     
     try:
         # 1. VALIDATE ENVIRONMENT PERMISSION (Strict enforcement)
-        # Get enforcer with proper dependency injection
-        enforcer_instance = await get_org_aware_enforcer(current_user, db)
         # Use new permission format: business_unit:deployments:create:{environment}
         permission_slug = f"business_unit:deployments:create:{request.environment}"
         
@@ -111,7 +109,7 @@ async def provision(
             from app.models.plugins import PluginAccessRequest, AccessRequestStatus
             
             # Use the enforcer_instance we already have
-            user_id = str(current_user.id)
+            user_id = current_user.id_str
             # Check if user is platform admin or has plugins:upload permission
             from app.core.authorization import check_platform_permission
             has_upload_permission = await check_platform_permission(current_user, "platform:plugins:upload", db, enforcer_instance.enforcer if hasattr(enforcer_instance, 'enforcer') else enforcer_instance)
@@ -297,7 +295,7 @@ async def provision(
                 plugin_id=request.plugin_id,
                 version=request.version,
                 deployment_name=deployment_name,
-                user_id=str(current_user.id),
+                user_id=current_user.id_str,
                 deployment_id=str(deployment.id)
             )
         else:
@@ -390,7 +388,6 @@ async def list_jobs(
     from datetime import datetime
     from sqlalchemy import func
     from app.models.deployment import Deployment
-    from app.api.deps import get_org_aware_enforcer
     from app.core.casbin import get_enforcer
     from app.core.organization import get_user_organization, get_organization_domain
     from app.core.authorization import get_user_platform_roles
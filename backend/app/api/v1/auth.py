@@ -47,11 +47,11 @@ async def get_user_with_roles(user: User, db: AsyncSession) -> UserResponse:
     # Pass org_domain explicitly to ensure correct domain is used
     if hasattr(enforcer, 'get_roles_for_user'):
         # MultiTenantEnforcerWrapper.get_roles_for_user accepts optional domain parameter
-        roles = enforcer.get_roles_for_user(str(user.id), org_domain)
+        roles = enforcer.get_roles_for_user(user.id_str, org_domain)
     else:
         # Base Casbin Enforcer, need to use get_implicit_roles_for_user with domain
         try:
-            implicit_roles = enforcer.get_implicit_roles_for_user(str(user.id), org_domain)
+            implicit_roles = enforcer.get_implicit_roles_for_user(user.id_str, org_domain)
             roles = []
             for role_info in implicit_roles:
                 if isinstance(role_info, (list, tuple)) and len(role_info) > 0:
@@ -9,10 +9,11 @@ from typing import List, Optional
 import uuid
 
 from app.database import get_db
-from app.api.deps import get_current_user, get_org_aware_enforcer, OrgAwareEnforcer, is_allowed_bu, get_active_business_unit, is_platform_admin, is_allowed
+from app.api.deps import get_current_user, get_org_aware_enforcer, OrgAwareEnforcer, is_allowed_bu, get_active_business_unit, is_platform_admin, is_allowed, invalidate_user_cache
 from app.models.rbac import User
 from app.models.business_unit import BusinessUnit, BusinessUnitMember
 from app.models.rbac import Role
+from app.core.authorization import invalidate_bu_access
 from app.schemas.business_unit import (
     BusinessUnitCreate, BusinessUnitUpdate, BusinessUnitResponse,
     BusinessUnitMemberResponse, BusinessUnitMemberAdd
@@ -67,7 +68,7 @@ async def list_business_units(
     # Grant permissions to existing members with manage_members permission
     if owner_memberships:
         # Get user's existing roles once (outside the loop)
-        user_roles = enforcer.get_roles_for_user(str(current_user.id))
+        user_roles = enforcer.get_roles_for_user(current_user.id_str)
         roles_updated = False
         
         # Grant platform permissions to roles that have business_units:manage_members
@@ -99,8 +100,8 @@ async def list_business_units(
         for membership in owner_memberships:
             owner_role = f"business-unit-owner-{membership.business_unit_id}"
             # Check if user already has this role
-            if not enforcer.has_grouping_policy(str(current_user.id), owner_role, org_domain):
-                enforcer.add_grouping_policy(str(current_user.id), owner_role, org_domain)
+            if not enforcer.has_grouping_policy(current_user.id_str, owner_role, org_domain):
+                enforcer.add_grouping_policy(current_user.id_str, owner_role, org_domain)
                 # Add permissions to the owner role
                 from app.core.permission_registry import parse_permission_slug
                 owner_permissions = [
@@ -146,13 +147,13 @@ async def list_business_units(
             
             # Also grant permission directly to the user for immediate effect
             # This ensures the permission check works even if role-based checking has issues
-            user_policies = enforcer.get_filtered_policy(0, str(current_user.id))
+            user_policies = enforcer.get_filtered_policy(0, current_user.id_str)
             user_policy_exists = any(
-                len(p) >= 4 and p[0] == str(current_user.id) and p[1] == org_domain and p[2] == obj and p[3] == act
+                len(p) >= 4 and p[0] == current_user.id_str and p[1] == org_domain and p[2] == obj and p[3] == act
                 for p in user_policies
             )
             if not user_policy_exists:
-                enforcer.add_policy(str(current_user.id), org_domain, obj, act)
+                enforcer.add_policy(current_user.id_str, org_domain, obj, act)
                 roles_updated = True
         except Exception as e:
             logger.warning(f"Failed to add {perm_slug} permission: {e}")
@@ -593,6 +594,7 @@ async def delete_business_unit(
     # Delete the business unit (members will be cascade deleted)
     await db.delete(bu)
     await db.commit()
+    invalidate_bu_access()
     
     logger.info(f"Business unit '{bu.name}' deleted by {current_user.email}")
     
@@ -800,6 +802,7 @@ async def add_business_unit_member(
     )
     db.add(new_member)
     await db.commit()
+    invalidate_bu_access(user.id, business_unit_id)
     await db.refresh(new_member, ["role"])
     
     # Create BU-scoped permissions for the role in this business unit
@@ -915,6 +918,7 @@ async def remove_business_unit_member(
     
     await db.delete(member)
     await db.commit()
+    invalidate_bu_access(user_id, business_unit_id)
     
     return None
 
@@ -955,6 +959,7 @@ async def set_active_business_unit(
         current_user.active_business_unit_id = None
     
     await db.commit()
+    invalidate_user_cache(current_user.id)
     await db.refresh(current_user)
     
     return {"business_unit_id": str(business_unit_id) if business_unit_id else None}
@@ -992,6 +997,7 @@ async def get_active_business_unit(
             # User no longer has access, clear it
             current_user.active_business_unit_id = None
             await db.commit()
+            invalidate_user_cache(current_user.id)
     
     return {"business_unit_id": None}
 
@@ -44,7 +44,7 @@ async def estimate_cost_pre_provision(
     This endpoint allows users to see cost estimates based on their
     configuration before actually creating the deployment.
     """
-    user_id = str(current_user.id)
+    user_id = current_user.id_str
     
     # Validate that it's a GCP plugin
     from app.models.plugins import PluginVersion
@@ -555,7 +555,7 @@ async def get_aggregate_costs(
     
     Aggregates costs for all deployments matching the filters.
     """
-    user_id = str(current_user.id)
+    user_id = current_user.id_str
 
     # Set default date range
     if not end_date:
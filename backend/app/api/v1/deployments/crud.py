@@ -51,7 +51,7 @@ async def list_deployments(
     # Admin sees all, engineer sees only their own
     # NOTE: user_id parameter is the query param for filtering by user (admin only)
     # current_user_id_str is the current logged-in user's ID for permission checks
-    current_user_id_str = str(current_user.id)
+    current_user_id_str = current_user.id_str
     
     # Check permissions using new format
     from app.core.authorization import check_permission, check_platform_permission
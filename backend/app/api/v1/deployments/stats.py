@@ -101,7 +101,7 @@ async def tag_usage_stats(
 ):
     """Get most commonly used tags across all deployments"""
     # Check permissions
-    user_id = str(current_user.id)
+    user_id = current_user.id_str
     
     # Base query
     query = select(
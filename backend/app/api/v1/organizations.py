@@ -9,7 +9,7 @@ from typing import List
 from app.database import get_db
 from app.models import User, Organization
 from app.schemas.organization import OrganizationCreate, OrganizationUpdate, OrganizationResponse
-from app.api.deps import get_current_user, is_allowed
+from app.api.deps import get_current_user, is_allowed, clear_user_cache
 from app.logger import logger
 import uuid
 
@@ -187,6 +187,7 @@ async def update_organization(
         organization.is_active = org_in.is_active
     
     await db.commit()
+    clear_user_cache()
     await db.refresh(organization)
     
     logger.info(f"Organization updated: {organization.name} by {current_user.email}")
@@ -6,6 +6,7 @@ from app.api.deps import get_current_active_superuser, is_allowed, get_db, OrgAw
 from app.schemas.rbac import RoleCreate, RoleUpdate, RoleResponse, PermissionResponse
 from app.models.rbac import Role, PermissionMetadata
 from app.core.permission_registry import parse_permission_slug, get_permission
+from app.core.authorization import invalidate_platform_role_names
 from uuid import uuid4, UUID
 from datetime import datetime
 
@@ -130,6 +131,7 @@ async def create_role(
     )
     db.add(role)
     await db.commit()
+    invalidate_platform_role_names()
     await db.refresh(role)
     
     # Add permissions in Casbin using new format parser
@@ -201,6 +203,7 @@ async def update_role(
         role.is_platform_role = role_in.is_platform_role
         
     await db.commit()
+    invalidate_platform_role_names()
     await db.refresh(role)
     
     # Update Casbin
@@ -318,5 +321,6 @@ async def delete_role(
     
     await db.delete(role)
     await db.commit()
+    invalidate_platform_role_names()
     
     return {"message": "Role deleted successfully"}
@@ -6,7 +6,7 @@ import shutil
 import os
 from pathlib import Path
 from app.database import get_db
-from app.api.deps import get_current_user, get_current_active_superuser, is_allowed, OrgAwareEnforcer, get_org_aware_enforcer
+from app.api.deps import get_current_user, get_current_active_superuser, is_allowed, OrgAwareEnforcer, get_org_aware_enforcer, invalidate_user_cache
 from app.models.rbac import User, Role
 from app.schemas.user import UserResponse, UserUpdate, UserAdminUpdate, UserPasswordUpdate, UserCreate, PaginatedUserResponse
 from app.core.security import get_password_hash, verify_password
@@ -23,7 +23,7 @@ async def user_to_response(user: User, enforcer: OrgAwareEnforcer, db: AsyncSess
     org = await get_user_organization(user, db)
     org_domain = get_organization_domain(org)
     
-    user_roles = enforcer.get_roles_for_user(str(user.id))
+    user_roles = enforcer.get_roles_for_user(user.id_str)
     
     # Filter roles to ensure they exist in the database (exclude group names)
     if user_roles:
@@ -73,7 +73,7 @@ async def get_my_permissions(
     from uuid import uuid4
     from datetime import datetime
     
-    user_id = str(current_user.id)
+    user_id = current_user.id_str
     
     # Get organization domain for proper role filtering
     organization = await get_user_organization(current_user, db)
@@ -94,27 +94,20 @@ async def get_my_permissions(
     
     all_permissions = set()
     for role in user_roles:
-        # Get all policies for this role (across all domains)
-        # Then filter by domain manually to ensure we get the right ones
+        # Get all policies for this role in one pass; domain filtering happens below because
+        # legacy 3-field policies have no domain column and a Casbin domain filter would drop them
         role_policies = base_enforcer.get_filtered_policy(0, role)
         
         for policy in role_policies:
-            # Check if policy belongs to this organization domain
             if len(policy) >= 4:
                 # Multi-tenant format: [role, domain, obj, act]
                 # New format: obj="deployments", act="create:development" -> slug="deployments:create:development"
-                policy_domain = str(policy[1]) if len(policy) > 1 else None
-                # Compare domains as strings to handle UUID formatting
-                if policy_domain == str(org_domain):
-                    obj = policy[2]
-                    act = policy[3]
+                if policy[1] == org_domain:
                     # Construct permission slug: obj:act (act may contain environment, e.g., "create:development")
-                    perm_slug = f"{obj}:{act}"
-                    all_permissions.add(perm_slug)
+                    all_permissions.add(f"{policy[2]}:{policy[3]}")
             elif len(policy) >= 3:
                 # Old format: [role, obj, act] - include it (no domain filtering needed)
-                perm_slug = f"{policy[1]}:{policy[2]}"
-                all_permissions.add(perm_slug)
+                all_permissions.add(f"{policy[1]}:{policy[2]}")
     
     # Debug: Log extracted permissions for troubleshooting
     import logging
@@ -179,7 +172,7 @@ async def get_my_debug_info(
     from app.core.organization import get_user_organization, get_organization_domain
     from app.core.casbin import get_enforcer as get_base_enforcer
     
-    user_id = str(current_user.id)
+    user_id = current_user.id_str
     
     # Get organization domain
     organization = await get_user_organization(current_user, db)
@@ -296,6 +289,7 @@ async def update_user_me(
         current_user.hashed_password = get_password_hash(user_update.password)
         
     await db.commit()
+    invalidate_user_cache(current_user.id)
     await db.refresh(current_user)
     return await user_to_response(current_user, enforcer, db)
 
@@ -336,6 +330,7 @@ async def upload_avatar(
     # Update user avatar URL
     current_user.avatar_url = f"/static/avatars/{filename}"
     await db.commit()
+    invalidate_user_cache(current_user.id)
     await db.refresh(current_user)
     
     return await user_to_response(current_user, enforcer, db)
@@ -360,6 +355,7 @@ async def change_password(
     # Update to new password
     current_user.hashed_password = get_password_hash(password_update.new_password)
     await db.commit()
+    invalidate_user_cache(current_user.id)
     
     return {"message": "Password updated successfully"}
 
@@ -451,13 +447,9 @@ async def list_users(
     user_responses = []
     # org_domain is already retrieved above for role filtering, reuse it here
     
-    # Ensure enforcer has org_domain set (OrgAwareEnforcer should already have it, but be safe)
-    if hasattr(enforcer, 'set_org_domain') and (not hasattr(enforcer, '_org_domain') or not enforcer._org_domain):
-        enforcer.set_org_domain(org_domain)
-    
     for user in users:
         # Get roles for user with organization domain
-        user_roles = enforcer.get_roles_for_user(str(user.id))
+        user_roles = enforcer.get_roles_for_user(user.id_str)
         
         # Filter roles to ensure they exist in the database (exclude group names)
         if user_roles:
@@ -586,12 +578,13 @@ async def update_user(
     if user_in.roles is not None:
         # Update roles via Casbin
         # First remove all existing roles for this user
-        enforcer.delete_roles_for_user(str(user.id))
+        enforcer.delete_roles_for_user(user.id_str)
         # Add new roles
         for role_name in user_in.roles:
-            enforcer.add_grouping_policy(str(user.id), role_name)
+            enforcer.add_grouping_policy(user.id_str, role_name)
                 
     await db.commit()
+    invalidate_user_cache(user.id)
     await db.refresh(user)
     return await user_to_response(user, enforcer, db)
 
@@ -605,7 +598,7 @@ async def delete_user(
     """
     Delete a user (Admin only)
     """
-    if str(current_user.id) == user_id:
+    if current_user.id_str == user_id:
         raise HTTPException(status_code=400, detail="Cannot delete your own account")
         
     result = await db.execute(select(User).where(User.id == user_id))
@@ -629,8 +622,9 @@ async def delete_user(
     await db.flush()
     
     # Remove all Casbin policies for this user
-    enforcer.delete_user(str(user.id))
+    enforcer.delete_user(user.id_str)
         
     # Delete the user (other related records should cascade from schema)
     await db.delete(user)
     await db.commit()
+    invalidate_user_cache(user_id)
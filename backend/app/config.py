@@ -1,12 +1,14 @@
 from pydantic_settings import BaseSettings
 from pydantic import field_validator
-from typing import List
+from typing import Dict, List
 from pathlib import Path
 
 class Settings(BaseSettings):
     PROJECT_NAME: str = "DevPlatform IDP"
     API_V1_STR: str = "/api/v1"
     DEBUG: bool = True
+    # Development/test only: raise on lazy relationship loads from current_user instead of querying
+    RAISE_ON_LAZY_LOAD: bool = False
     
     # Database
     DATABASE_URL: str
@@ -42,6 +44,10 @@ class Settings(BaseSettings):
     WEBHOOK_BASE_URL: str = ""  # Base URL for webhook endpoints (e.g., "https://your-domain.com")
     MICROSERVICE_REPO_ORG: str = ""  # Optional: Organization name for creating repos (empty = user's account)
     
+    # Requests per minute allowed to each upstream identity provider, per account/tenant
+    # (e.g. '{"aws-sts": 100, "azure-ad": 200}'); unlisted upstreams use 100
+    UPSTREAM_RATE_LIMITS: Dict[str, int] = {}
+    
     # Celery Configuration
     CELERY_BROKER_URL: str = "redis://localhost:6379/0"
     CELERY_RESULT_BACKEND: str = "redis://localhost:6379/0"
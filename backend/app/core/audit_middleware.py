@@ -11,8 +11,8 @@ import time
 from app.logger import logger
 from app.database import AsyncSessionLocal
 from app.services.audit_service import log_audit_event
-from app.api.deps import get_current_user
-from jose import JWTError, jwt
+from app.api.deps import get_current_user, verify_access_token
+from jwt import PyJWTError
 from app.config import settings
 
 
@@ -73,13 +73,10 @@ class AuditLoggingMiddleware(BaseHTTPMiddleware):
             if auth_header and auth_header.startswith("Bearer "):
                 token = auth_header.split(" ")[1]
                 try:
-                    payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-                    user_id_str = payload.get("sub")
-                    token_type = payload.get("type")
-                    
-                    if user_id_str and token_type == "access":
+                    user_id_str = verify_access_token(token)
+                    if user_id_str:
                         user_id = UUID(user_id_str)
-                except (JWTError, ValueError):
+                except (PyJWTError, ValueError):
                     # Invalid token, continue without user_id
                     pass
         except Exception:
@@ -13,8 +13,49 @@ from casbin import Enforcer
 
 from app.models.rbac import User, Role
 from app.models.business_unit import BusinessUnitMember
-from app.core.organization import get_user_organization, get_organization_domain
-from app.core.permission_registry import get_permission_scope, parse_permission_slug
+from app.core.organization import get_user_organization_domain
+from app.core.permission_registry import resolve_permission
+from app.core.enforcer_wrapper import ensure_org_domain, unwrap_enforcer
+from app.core.ttl_cache import TTLCache
+
+# Names of roles with is_platform_role = True. Role endpoints invalidate this process's copy;
+# other workers pick up changes within the TTL.
+PLATFORM_ROLE_NAMES_TTL = 30
+_platform_role_names = TTLCache(maxsize=1)
+
+
+async def get_platform_role_names(db: AsyncSession) -> frozenset[str]:
+    """Get the names of all platform roles, cached for PLATFORM_ROLE_NAMES_TTL seconds"""
+    names = _platform_role_names.get("names")
+    if names is None:
+        from sqlalchemy.future import select
+        
+        result = await db.execute(select(Role.name).where(Role.is_platform_role == True))
+        names = frozenset(result.scalars().all())
+        _platform_role_names.set("names", names, ttl=PLATFORM_ROLE_NAMES_TTL)
+    return names
+
+
+def invalidate_platform_role_names() -> None:
+    """Drop the cached platform role names after a role is created, updated or deleted"""
+    _platform_role_names.clear()
+
+
+# (user_id, business_unit_id) -> whether the user is a member. Membership endpoints invalidate
+# this process's entries; other workers pick up changes within the TTL.
+BU_ACCESS_TTL = 30
+_bu_access = TTLCache(maxsize=10_000)
+
+
+def invalidate_bu_access(user_id: Optional[uuid.UUID] = None, business_unit_id: Optional[uuid.UUID] = None) -> None:
+    """
+    Drop cached business unit membership after members are added or removed.
+    Without both IDs (e.g. a business unit was deleted) the whole cache is cleared.
+    """
+    if user_id is None or business_unit_id is None:
+        _bu_access.clear()
+    else:
+        _bu_access.pop((user_id, business_unit_id))
 
 
 async def get_user_platform_roles(
@@ -27,8 +68,6 @@ async def get_user_platform_roles(
     Get user's platform-level roles (not BU-scoped).
     Platform roles are roles where is_platform_role = True.
     """
-    from sqlalchemy.future import select
-    
     # Get all roles for user in this organization
     # Handle different enforcer types:
     # 1. OrgAwareEnforcer (from deps.py) - has _enforcer and _org_domain, get_roles_for_user(user_id)
@@ -44,40 +83,27 @@ async def get_user_platform_roles(
         # MultiTenantEnforcerWrapper.get_roles_for_user accepts optional domain
         # But if _org_domain is set, we don't need to pass it
         try:
-            user_roles = enforcer.get_roles_for_user(str(user.id))
+            user_roles = enforcer.get_roles_for_user(user.id_str)
         except TypeError:
             # If that fails, try with domain
-            user_roles = enforcer.get_roles_for_user(str(user.id), org_domain)
+            user_roles = enforcer.get_roles_for_user(user.id_str, org_domain)
     elif hasattr(enforcer, 'enforcer'):
         # It's a wrapper but not the expected type, access underlying enforcer
         base_enforcer = enforcer.enforcer
         try:
-            implicit_roles = base_enforcer.get_implicit_roles_for_user(str(user.id), org_domain)
-            user_roles = []
-            for role_info in implicit_roles:
-                if isinstance(role_info, (list, tuple)) and len(role_info) > 0:
-                    user_roles.append(role_info[0])
-                else:
-                    user_roles.append(role_info)
-            user_roles = list(set(user_roles))
+            # Casbin returns de-duplicated role name strings
+            user_roles = base_enforcer.get_implicit_roles_for_user(user.id_str, org_domain)
         except Exception:
             user_roles = []
     else:
         # It's base Casbin Enforcer, use get_implicit_roles_for_user with domain
         try:
-            implicit_roles = enforcer.get_implicit_roles_for_user(str(user.id), org_domain)
-            # Extract role names from implicit roles
-            user_roles = []
-            for role_info in implicit_roles:
-                if isinstance(role_info, (list, tuple)) and len(role_info) > 0:
-                    user_roles.append(role_info[0])
-                else:
-                    user_roles.append(role_info)
-            user_roles = list(set(user_roles))
+            # Casbin returns de-duplicated role name strings
+            user_roles = enforcer.get_implicit_roles_for_user(user.id_str, org_domain)
         except Exception:
             # Fallback: try get_roles_for_user without domain
             try:
-                user_roles = enforcer.get_roles_for_user(str(user.id))
+                user_roles = enforcer.get_roles_for_user(user.id_str)
             except Exception:
                 user_roles = []
     
@@ -85,11 +111,9 @@ async def get_user_platform_roles(
     if not user_roles:
         return []
     
-    result = await db.execute(
-        select(Role).where(Role.name.in_(user_roles), Role.is_platform_role == True)
-    )
-    platform_roles = result.scalars().all()
-    return [r.name for r in platform_roles]
+    platform_role_names = await get_platform_role_names(db)
+    # Implicit role lookups can repeat a role; return each platform role once, as the per-role query did
+    return list(dict.fromkeys(role for role in user_roles if role in platform_role_names))
 
 
 async def get_bu_membership(
@@ -100,19 +124,66 @@ async def get_bu_membership(
     """
     Get user's membership in a specific business unit with role.
     Returns BusinessUnitMember if user is a member, None otherwise.
+    
+    Memoized on the session (one per request), so get_active_business_unit, is_allowed_bu
+    and check_bu_permission share a single query for the same user and business unit.
     """
     from sqlalchemy.future import select
-    from sqlalchemy.orm import selectinload
+    from sqlalchemy.orm import joinedload
     
+    memberships = db.info.setdefault("bu_memberships", {})
+    key = (user_id, business_unit_id)
+    if key in memberships:
+        return memberships[key]
+    
+    # Role is many-to-one: join it into the same statement instead of a second SELECT
     result = await db.execute(
         select(BusinessUnitMember)
-        .options(selectinload(BusinessUnitMember.role))
+        .options(joinedload(BusinessUnitMember.role))
         .where(
             BusinessUnitMember.user_id == user_id,
             BusinessUnitMember.business_unit_id == business_unit_id
         )
     )
-    return result.scalar_one_or_none()
+    membership = memberships[key] = result.scalar_one_or_none()
+    _bu_access.set(key, membership is not None, ttl=BU_ACCESS_TTL)
+    return membership
+
+
+async def has_bu_access(
+    user_id: uuid.UUID,
+    business_unit_id: uuid.UUID,
+    db: AsyncSession
+) -> bool:
+    """
+    Check whether a user is a member of a business unit.
+    
+    Answers from a short-lived cache shared across requests (BU_ACCESS_TTL seconds),
+    so selecting a business unit doesn't cost a SELECT on every request.
+    Use get_bu_membership when the member's role is needed.
+    """
+    is_member = _bu_access.get((user_id, business_unit_id))
+    if is_member is None:
+        is_member = await get_bu_membership(user_id, business_unit_id, db) is not None
+    return is_member
+
+
+def _get_user_roles(enforcer: Enforcer, user_id: str, org_domain: str) -> list[str]:
+    """Get all of a user's roles in the organization, for user-scope permissions"""
+    # Handle different enforcer types for getting user roles
+    if hasattr(enforcer, '_org_domain'):
+        # It's OrgAwareEnforcer or MultiTenantEnforcerWrapper, don't pass org_domain
+        return enforcer.get_roles_for_user(user_id)
+    elif hasattr(enforcer, 'get_roles_for_user') and hasattr(enforcer, 'get_implicit_roles_for_user'):
+        # It's MultiTenantEnforcerWrapper, can pass domain
+        return enforcer.get_roles_for_user(user_id, org_domain)
+    # It's base Casbin Enforcer, use get_implicit_roles_for_user with domain
+    try:
+        # Casbin returns de-duplicated role name strings
+        return enforcer.get_implicit_roles_for_user(user_id, org_domain)
+    except Exception:
+        # Fallback: try get_roles_for_user without domain
+        return enforcer.get_roles_for_user(user_id)
 
 
 async def check_permission(
@@ -140,43 +211,26 @@ async def check_permission(
     Returns:
         True if user has permission, False otherwise
     """
-    # Parse permission - extract resource and action (scope prefix is handled separately)
+    # Parse permission - extract scope, resource and action (memoized per slug)
     try:
-        obj, act = parse_permission_slug(permission_slug)
+        scope, obj, act = resolve_permission(permission_slug)
     except ValueError:
         return False
     
     # Get org domain
-    org = await get_user_organization(user, db)
-    org_domain = get_organization_domain(org)
-    user_id = str(user.id)
+    org_domain = get_user_organization_domain(user)
+    user_id = user.id_str
     
     # Ensure enforcer has org_domain set if it's a wrapper
-    if hasattr(enforcer, 'set_org_domain') and (not hasattr(enforcer, '_org_domain') or not enforcer._org_domain):
-        enforcer.set_org_domain(org_domain)
-    
-    # Check if enforcer is OrgAwareEnforcer (only takes 3 args) or base enforcer (takes 4 args)
-    is_org_aware = hasattr(enforcer, '_org_domain') and hasattr(enforcer, '_enforcer')
-    
-    # Check permission scope from slug prefix
-    scope = get_permission_scope(permission_slug)
+    ensure_org_domain(enforcer, org_domain)
     
-    # Check if enforcer is OrgAwareEnforcer (only takes 3 args) or base enforcer (takes 4 args)
-    is_org_aware = hasattr(enforcer, '_org_domain') and hasattr(enforcer, '_enforcer')
+    # Every wrapper type ends up at the same Casbin enforcer; call it with the domain explicitly
+    enforce = unwrap_enforcer(enforcer).enforce
     
     if scope == "platform":
         # Platform permission: Check platform roles only
         platform_roles = await get_user_platform_roles(user, db, enforcer, org_domain)
-        for role in platform_roles:
-            if is_org_aware:
-                # OrgAwareEnforcer: (role, obj, act) - org_domain is injected automatically
-                if enforcer.enforce(role, obj, act):
-                    return True
-            else:
-                # Base enforcer: (role, org_domain, obj, act)
-                if enforcer.enforce(role, org_domain, obj, act):
-                    return True
-        return False
+        return any(enforce(role, org_domain, obj, act) for role in platform_roles)
     
     elif scope == "business_unit":
         # BU permission: Require active BU
@@ -188,60 +242,16 @@ async def check_permission(
         if not membership or not membership.role:
             return False
         
-        # Get role and check permission
-        role = membership.role
-        # Check with BU context: bu:{bu_id}:resource
+        # Check with BU context: bu:{bu_id}:resource, falling back to the resource without BU prefix
+        role_name = membership.role.name
         bu_obj = f"bu:{business_unit_id}:{obj}"
-        
-        if is_org_aware:
-            # OrgAwareEnforcer: (role.name, bu_obj, act) - org_domain is injected automatically
-            has_permission = enforcer.enforce(role.name, bu_obj, act)
-            # Fallback: Check without BU prefix
-            if not has_permission:
-                has_permission = enforcer.enforce(role.name, obj, act)
-        else:
-            # Base enforcer: (role.name, org_domain, bu_obj, act)
-            has_permission = enforcer.enforce(role.name, org_domain, bu_obj, act)
-            # Fallback: Check without BU prefix
-            if not has_permission:
-                has_permission = enforcer.enforce(role.name, org_domain, obj, act)
-        
-        return has_permission
+        return enforce(role_name, org_domain, bu_obj, act) or enforce(role_name, org_domain, obj, act)
     
     else:  # user scope
         # User-specific permissions (profile, etc.)
         # Check if user has any role with this permission
-        # Handle different enforcer types for getting user roles
-        if hasattr(enforcer, '_org_domain'):
-            # It's OrgAwareEnforcer or MultiTenantEnforcerWrapper, don't pass org_domain
-            user_roles = enforcer.get_roles_for_user(user_id)
-        elif hasattr(enforcer, 'get_roles_for_user') and hasattr(enforcer, 'get_implicit_roles_for_user'):
-            # It's MultiTenantEnforcerWrapper, can pass domain
-            user_roles = enforcer.get_roles_for_user(user_id, org_domain)
-        else:
-            # It's base Casbin Enforcer, use get_implicit_roles_for_user with domain
-            try:
-                implicit_roles = enforcer.get_implicit_roles_for_user(user_id, org_domain)
-                user_roles = []
-                for role_info in implicit_roles:
-                    if isinstance(role_info, (list, tuple)) and len(role_info) > 0:
-                        user_roles.append(role_info[0])
-                    else:
-                        user_roles.append(role_info)
-                user_roles = list(set(user_roles))
-            except Exception:
-                # Fallback: try get_roles_for_user without domain
-                user_roles = enforcer.get_roles_for_user(user_id)
-        for role in user_roles:
-            if is_org_aware:
-                # OrgAwareEnforcer: (role, obj, act) - org_domain is injected automatically
-                if enforcer.enforce(role, obj, act):
-                    return True
-            else:
-                # Base enforcer: (role, org_domain, obj, act)
-                if enforcer.enforce(role, org_domain, obj, act):
-                    return True
-        return False
+        user_roles = _get_user_roles(enforcer, user_id, org_domain)
+        return any(enforce(role, org_domain, obj, act) for role in user_roles)
 
 
 async def check_bu_permission(
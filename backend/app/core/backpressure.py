@@ -0,0 +1,184 @@
+"""
+Adaptive admission control for throttled upstream identity providers.
+
+Each upstream (AWS STS, Azure AD, ...) gets an AIMD concurrency limit:
+- additive increase while the recent average latency stays under target
+- multiplicative decrease on throttling / 5xx responses or when latency exceeds target
+combined with a sliding-window requests-per-minute cap so we slow down before
+the provider starts returning 429s. Providers throttle per account/tenant, so each
+(upstream, target) pair gets its own controller; the per-minute cap can be set per
+upstream with settings.UPSTREAM_RATE_LIMITS.
+
+Usage:
+    async with admission("aws-sts", account_id):
+        ...
+    async with admission("azure-ad", tenant_id) as slot:
+        resp = await client.post(...)
+        slot.record_status(resp.status_code)
+"""
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Deque, Dict, Optional, Tuple
+
+from app.config import settings
+from app.logger import logger
+
+DEFAULT_MAX_PER_MINUTE = 100
+
+
+class AIMDController:
+    """Concurrency limiter whose limit adapts to upstream latency and throttling"""
+
+    def __init__(
+        self,
+        name: str,
+        initial_limit: float = 4.0,
+        min_limit: float = 1.0,
+        max_limit: float = 32.0,
+        alpha: float = 0.5,
+        beta: float = 0.5,
+        target_latency: float = 1.0,
+        window: int = 20,
+        max_per_minute: int = DEFAULT_MAX_PER_MINUTE
+    ):
+        self.name = name
+        self.limit = initial_limit
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.alpha = alpha
+        self.beta = beta
+        self.target_latency = target_latency
+        self.max_per_minute = max_per_minute
+        self._latencies: Deque[float] = deque(maxlen=window)
+        # Start times of calls in the sliding window, including reserved future starts
+        self._calls: Deque[float] = deque()
+        self._in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _bind_loop(self):
+        # Waiter futures belong to one loop; Celery workers run each task in a fresh loop
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._in_flight = 0
+            self._waiters.clear()
+        return loop
+
+    async def _wait_for_rate(self):
+        """
+        Wait until the sliding one-minute window has room for another call.
+        
+        The start time is reserved before sleeping (the call max_per_minute places back
+        must be a minute old), so waiters don't hold anything while they sleep and don't
+        all wake up to race for the same opening.
+        """
+        now = time.monotonic()
+        while self._calls and now - self._calls[0] >= 60:
+            self._calls.popleft()
+        start = now
+        if len(self._calls) >= self.max_per_minute:
+            start = max(now, self._calls[-self.max_per_minute] + 60)
+        self._calls.append(start)
+        if start > now:
+            await asyncio.sleep(start - now)
+
+    async def acquire(self):
+        loop = self._bind_loop()
+        await self._wait_for_rate()
+        while self._in_flight >= max(1, int(self.limit)):
+            waiter = loop.create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            finally:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+        self._in_flight += 1
+
+    def release(self, latency: float, overloaded: bool):
+        self._in_flight = max(0, self._in_flight - 1)
+        self._latencies.append(latency)
+
+        average = sum(self._latencies) / len(self._latencies)
+        if overloaded or average > self.target_latency:
+            previous = self.limit
+            self.limit = max(self.min_limit, self.limit * self.beta)
+            # Start a fresh latency window so one slow burst doesn't keep shrinking the limit
+            self._latencies.clear()
+            if self.limit < previous:
+                logger.warning(
+                    "Backpressure on %s: concurrency limit %.1f -> %.1f (overloaded=%s, avg latency=%.2fs)",
+                    self.name, previous, self.limit, overloaded, average
+                )
+        else:
+            self.limit = min(self.max_limit, self.limit + self.alpha)
+
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+
+
+class AdmissionSlot:
+    """Handle yielded by admission() so callers can report non-exception failures"""
+
+    def __init__(self):
+        self.overloaded = False
+
+    def record_status(self, status_code: int):
+        if status_code == 429 or status_code >= 500:
+            self.overloaded = True
+
+
+_controllers: Dict[Tuple[str, Optional[str]], AIMDController] = {}
+
+
+def get_controller(key: str, target: Optional[str] = None) -> AIMDController:
+    """Controller for one upstream (e.g. "aws-sts") and target account/tenant"""
+    controller = _controllers.get((key, target))
+    if controller is None:
+        max_per_minute = settings.UPSTREAM_RATE_LIMITS.get(key, DEFAULT_MAX_PER_MINUTE)
+        name = f"{key}:{target}" if target else key
+        controller = _controllers[(key, target)] = AIMDController(name, max_per_minute=max_per_minute)
+    return controller
+
+
+def _is_overload_error(exc: BaseException) -> bool:
+    """Detect throttling or server errors from botocore/httpx/FastAPI exceptions"""
+    status_code = getattr(exc, "status_code", None)
+
+    # botocore ClientError
+    response = getattr(exc, "response", None)
+    if isinstance(response, dict):
+        error_code = response.get("Error", {}).get("Code", "")
+        if error_code in ("Throttling", "ThrottlingException", "RequestLimitExceeded", "TooManyRequestsException"):
+            return True
+        status_code = response.get("ResponseMetadata", {}).get("HTTPStatusCode", status_code)
+    elif response is not None:
+        # httpx.HTTPStatusError
+        status_code = getattr(response, "status_code", status_code)
+
+    return isinstance(status_code, int) and (status_code == 429 or status_code >= 500)
+
+
+@asynccontextmanager
+async def admission(key: str, target: Optional[str] = None):
+    """
+    Admit one call to the upstream identified by `key` (for the account/tenant `target`),
+    recording its latency and outcome
+    """
+    controller = get_controller(key, target)
+    await controller.acquire()
+    slot = AdmissionSlot()
+    overloaded = False
+    start = time.perf_counter()
+    try:
+        yield slot
+    except Exception as exc:
+        overloaded = _is_overload_error(exc)
+        raise
+    finally:
+        controller.release(time.perf_counter() - start, overloaded or slot.overloaded)
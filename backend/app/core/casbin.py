@@ -6,8 +6,11 @@ from app.config import settings
 from app.core.enforcer_wrapper import MultiTenantEnforcerWrapper, create_enforcer_with_org_context
 from app.models.rbac import User
 from typing import Optional
+import asyncio
 import os
+import threading
 import time
+from app.logger import logger
 
 # Create a synchronous engine for Casbin adapter
 # The adapter currently requires a sync engine
@@ -23,8 +26,229 @@ adapter = Adapter(engine)
 # Path to model.conf
 model_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "rbac_model.conf")
 
+
+class CachedEnforcer(casbin.Enforcer):
+    """
+    Casbin enforcer that memoizes enforce() and has_grouping_policy() results.
+    Cache misses for domain requests are evaluated against that domain's rules only.
+    
+    All derived state is dropped whenever the in-memory policy changes: on a reload that
+    brings in different rules and on every add/update/remove, including changes
+    made through wrappers. Changes hold _reload_lock and invalidate after they are applied,
+    so a concurrent cache miss can't re-cache the decision from before the change.
+    """
+    
+    CACHE_MAX_SIZE = 16384
+    TENANT_ENFORCERS_MAX = 1024
+    
+    def __init__(self, model_path: str, *args, **kwargs):
+        # Must exist before super().__init__(), which loads the policy
+        self._model_path = model_path
+        self._enforce_cache = {}
+        self._grouping_cache = {}
+        # domain -> role names assigned in that domain, rebuilt lazily after any change
+        self._domain_roles = None
+        # domain -> enforcer holding only that domain's rules, rebuilt lazily after any change
+        self._tenant_enforcers = {}
+        # Serializes policy changes, policy swaps and cache misses
+        self._reload_lock = threading.RLock()
+        # Bumped on every in-memory change; a reload read before a change must not replace it
+        self._policy_generation = 0
+        super().__init__(model_path, *args, **kwargs)
+    
+    def invalidate_cache(self):
+        """Drop all memoized decisions"""
+        self._enforce_cache.clear()
+        self._grouping_cache.clear()
+        self._domain_roles = None
+        self._tenant_enforcers = {}
+    
+    def _policy_changed(self):
+        """Record an in-memory policy change (call with _reload_lock held, after the change)"""
+        self._policy_generation += 1
+        self.invalidate_cache()
+    
+    @property
+    def policy_generation(self) -> int:
+        return self._policy_generation
+    
+    @staticmethod
+    def _remember(cache: dict, key, value):
+        if len(cache) >= CachedEnforcer.CACHE_MAX_SIZE:
+            cache.clear()
+        cache[key] = value
+    
+    def _tenant_enforcer(self, domain: str) -> casbin.Enforcer:
+        """
+        Enforcer over just one domain's p/g rules, copied from the loaded policy.
+        
+        The matcher requires r.dom == p.dom and resolves roles within r.dom, so a
+        domain's decisions never depend on other tenants' rules; evaluating against
+        the subset walks O(rules in domain) instead of every tenant's policy.
+        """
+        tenant = self._tenant_enforcers.get(domain)
+        if tenant is None:
+            tenant = casbin.Enforcer(self._model_path)
+            policies = self.get_filtered_policy(1, domain)
+            if policies:
+                tenant.add_policies(policies)
+            grouping = self.get_filtered_grouping_policy(2, domain)
+            if grouping:
+                tenant.add_grouping_policies(grouping)
+            if len(self._tenant_enforcers) >= self.TENANT_ENFORCERS_MAX:
+                self._tenant_enforcers = {}
+            self._tenant_enforcers[domain] = tenant
+        return tenant
+    
+    def enforce(self, *rvals):
+        try:
+            return self._enforce_cache[rvals]
+        except KeyError:
+            pass
+        with self._reload_lock:
+            if len(rvals) == 4:
+                # (sub, dom, obj, act)
+                result = self._tenant_enforcer(rvals[1]).enforce(*rvals)
+            else:
+                result = super().enforce(*rvals)
+            self._remember(self._enforce_cache, rvals, result)
+        return result
+    
+    def has_grouping_policy(self, *params):
+        try:
+            return self._grouping_cache[params]
+        except KeyError:
+            pass
+        with self._reload_lock:
+            result = super().has_grouping_policy(*params)
+            self._remember(self._grouping_cache, params, result)
+        return result
+    
+    def get_roles_in_domain(self, domain: str) -> list:
+        """Roles that appear in any role assignment ("g" rule) within `domain`"""
+        index = self._domain_roles
+        if index is None:
+            index = {}
+            # Format: [user/group, role, domain]
+            for rule in self.get_grouping_policy():
+                if len(rule) >= 3:
+                    index.setdefault(rule[2], set()).add(rule[1])
+            self._domain_roles = index
+        return list(index.get(domain, ()))
+    
+    def _policy_snapshot(self):
+        """Hashable view of every p/g rule currently loaded"""
+        return tuple(
+            (sec, ptype, tuple(tuple(rule) for rule in assertion.policy))
+            for sec in ("p", "g")
+            for ptype, assertion in sorted(self.model.model.get(sec, {}).items())
+        )
+    
+    def load_policy_copy(self) -> casbin.Enforcer:
+        """
+        Load the stored policy into a separate enforcer (model plus role links).
+        Leaves this enforcer untouched, so it can run on a worker thread; apply it with swap_policy().
+        """
+        return casbin.Enforcer(self._model_path, self.adapter)
+    
+    def swap_policy(self, loaded: casbin.Enforcer, generation: int) -> bool:
+        """
+        Replace the in-memory policy with one built by load_policy_copy().
+        
+        The model and role managers are swapped as references under the lock, so readers see
+        either the old or the new role graph, never a half-rebuilt one. Returns False (and keeps
+        the current policy) if the policy changed in memory since `generation` was read, as the
+        loaded copy may predate that change.
+        """
+        with self._reload_lock:
+            if generation != self._policy_generation:
+                return False
+            before = self._policy_snapshot()
+            self.model = loaded.model
+            self.rm_map = loaded.rm_map
+            self.cond_rm_map = loaded.cond_rm_map
+            # get_enforcer() reloads every few seconds; keep cached decisions if nothing changed
+            if self._policy_snapshot() != before:
+                self.invalidate_cache()
+            return True
+    
+    def load_policy(self):
+        for _ in range(3):
+            generation = self._policy_generation
+            if self.swap_policy(self.load_policy_copy(), generation):
+                return
+        logger.warning("Casbin policy kept changing during reload; keeping the in-memory policy")
+    
+    def load_filtered_policy(self, filter):
+        with self._reload_lock:
+            super().load_filtered_policy(filter)
+            self._policy_changed()
+    
+    def clear_policy(self):
+        with self._reload_lock:
+            super().clear_policy()
+            self._policy_changed()
+    
+    def _add_policy(self, *args, **kwargs):
+        with self._reload_lock:
+            result = super()._add_policy(*args, **kwargs)
+            self._policy_changed()
+        return result
+    
+    def _add_policies(self, *args, **kwargs):
+        with self._reload_lock:
+            result = super()._add_policies(*args, **kwargs)
+            self._policy_changed()
+        return result
+    
+    def _update_policy(self, *args, **kwargs):
+        with self._reload_lock:
+            result = super()._update_policy(*args, **kwargs)
+            self._policy_changed()
+        return result
+    
+    def _update_policies(self, *args, **kwargs):
+        with self._reload_lock:
+            result = super()._update_policies(*args, **kwargs)
+            self._policy_changed()
+        return result
+    
+    def _update_filtered_policies(self, *args, **kwargs):
+        with self._reload_lock:
+            result = super()._update_filtered_policies(*args, **kwargs)
+            self._policy_changed()
+        return result
+    
+    def _remove_policy(self, *args, **kwargs):
+        with self._reload_lock:
+            result = super()._remove_policy(*args, **kwargs)
+            self._policy_changed()
+        return result
+    
+    def _remove_policies(self, *args, **kwargs):
+        with self._reload_lock:
+            result = super()._remove_policies(*args, **kwargs)
+            self._policy_changed()
+        return result
+    
+    def _remove_filtered_policy(self, *args, **kwargs):
+        with self._reload_lock:
+            result = super()._remove_filtered_policy(*args, **kwargs)
+            self._policy_changed()
+        return result
+    
+    def _remove_filtered_policy_returns_effects(self, *args, **kwargs):
+        with self._reload_lock:
+            result = super()._remove_filtered_policy_returns_effects(*args, **kwargs)
+            self._policy_changed()
+        return result
+
+
 # Initialize enforcer
-_base_enforcer = casbin.Enforcer(model_path, adapter)
+_base_enforcer = CachedEnforcer(model_path, adapter)
+# Persist each add/remove through the adapter as it happens (single-row INSERT/DELETE),
+# so request paths never need save_policy(), which rewrites the whole casbin_rule table
+_base_enforcer.enable_auto_save(True)
 
 # For backward compatibility, keep the global enforcer reference
 # but it will be wrapped
@@ -48,6 +272,39 @@ def invalidate_policy_cache():
     """Invalidate policy cache - call this when permissions change"""
     _policy_cache["last_reload"] = 0
 
+def _reload_policy_in_background(loop: asyncio.AbstractEventLoop):
+    """Load the policy on a worker thread, then swap it in on the event loop thread"""
+    generation = _base_enforcer.policy_generation
+    try:
+        loaded = _base_enforcer.load_policy_copy()
+    except Exception as e:
+        logger.error(f"Background Casbin policy reload failed: {e}")
+        return
+    # A copy that raced an in-memory change is dropped; the next TTL refresh loads again
+    loop.call_soon_threadsafe(_base_enforcer.swap_policy, loaded, generation)
+
+def _refresh_policy():
+    """
+    Reload policy if the cache expired.
+    
+    The reload is a synchronous DB read plus a role-link rebuild, done on a separate model
+    and swapped in afterwards. When called from the event loop, a routine TTL refresh builds
+    it on a worker thread and swaps it in on the loop thread, so it doesn't stall other
+    requests (the enforcer keeps answering from the current policy until then).
+    An explicit invalidate_policy_cache() still reloads before returning.
+    """
+    forced = _policy_cache["last_reload"] == 0
+    if not _should_reload_policy():
+        return
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        loop = None
+    if loop is None or forced:
+        _base_enforcer.load_policy()
+    else:
+        loop.run_in_executor(None, _reload_policy_in_background, loop)
+
 def get_enforcer():
     """
     Dependency to get Casbin enforcer.
@@ -55,13 +312,20 @@ def get_enforcer():
     Returns a wrapper that accepts both old (3-param) and new (4-param) formats.
     For proper multi-tenancy, the wrapper needs org_domain to be set via set_org_domain().
     """
-    # Reload policy only if cache expired (performance optimization)
-    if _should_reload_policy():
-        _base_enforcer.load_policy()
     # Return wrapper that supports both old and new formats
-    wrapper = MultiTenantEnforcerWrapper(_base_enforcer)
+    wrapper = MultiTenantEnforcerWrapper(get_base_enforcer())
     return wrapper
 
+def get_base_enforcer() -> CachedEnforcer:
+    """
+    Get the shared Casbin enforcer without a wrapper.
+    
+    Callers must pass the organization domain explicitly (sub, dom, obj, act).
+    """
+    # Reload policy only if cache expired (performance optimization)
+    _refresh_policy()
+    return _base_enforcer
+
 async def get_enforcer_with_org(
     current_user: Optional[User] = None,
     db: Optional[AsyncSession] = None,
@@ -81,8 +345,7 @@ async def get_enforcer_with_org(
         MultiTenantEnforcerWrapper with organization context set
     """
     # Reload policy only if cache expired (performance optimization)
-    if _should_reload_policy():
-        _base_enforcer.load_policy()
+    _refresh_policy()
     
     # Determine organization domain
     domain = org_domain
@@ -717,3 +717,30 @@ async def create_bu_scoped_rbac_tables(db: AsyncSession):
             logger.warning(f"Failed to create BU-scoped RBAC tables/columns: {e}")
             await db.rollback()
             # Don't raise - let the app continue, but log the error
+
+
+async def backfill_plugin_icon_paths(db: AsyncSession):
+    """
+    Record the icon location (manifest['_icon_url_path']) for plugin versions uploaded before
+    upload_plugin started storing it, so listing plugins never has to probe the filesystem.
+    Idempotent: versions that already have it are skipped.
+    """
+    from app.logger import logger
+    from app.models.plugins import PluginVersion
+    from app.services.storage import storage_service
+    
+    result = await db.execute(select(PluginVersion))
+    updated = 0
+    for version in result.scalars().all():
+        manifest = version.manifest or {}
+        icon_path = manifest.get('icon')
+        if not icon_path or '_icon_url_path' in manifest:
+            continue
+        icon_url_path = storage_service.resolve_icon_path(version.plugin_id, version.version, icon_path)
+        # Reassign: the JSON column doesn't track in-place changes
+        version.manifest = {**manifest, '_icon_url_path': icon_url_path}
+        updated += 1
+    
+    if updated:
+        await db.commit()
+        logger.info(f"Recorded icon locations for {updated} plugin version(s)")
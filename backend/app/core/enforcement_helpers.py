@@ -23,7 +23,7 @@ async def get_enforcement_context(
         if not enforcer.enforce(user_id, org_domain, "resource", "action"):
             raise HTTPException(403)
     """
-    user_id = str(current_user.id)
+    user_id = current_user.id_str
     organization = await get_user_organization(current_user, db)
     org_domain = get_organization_domain(organization)
     return user_id, org_domain
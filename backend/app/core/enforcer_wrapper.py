@@ -160,17 +160,8 @@ class MultiTenantEnforcerWrapper:
         # Use Casbin's implicit roles to get roles through groups
         # This handles: user -> group -> role hierarchy
         try:
-            implicit_roles = self.enforcer.get_implicit_roles_for_user(user, target_domain)
-            # Implicit roles returns roles in format that may include domain
-            # Extract just the role names
-            roles = []
-            for role_info in implicit_roles:
-                if isinstance(role_info, (list, tuple)) and len(role_info) > 0:
-                    # If it's a tuple/list, take the first element (role name)
-                    roles.append(role_info[0] if len(role_info) > 0 else role_info)
-                else:
-                    roles.append(role_info)
-            return list(set(roles))  # Remove duplicates
+            # Casbin returns de-duplicated role name strings
+            return self.enforcer.get_implicit_roles_for_user(user, target_domain)
         except Exception:
             # Fallback: manually check direct roles and groups
             all_policies = self.enforcer.get_filtered_grouping_policy(0, user)
@@ -244,6 +235,24 @@ class MultiTenantEnforcerWrapper:
         return self.enforcer.get_policy()
 
 
+def ensure_org_domain(enforcer, org_domain: str) -> None:
+    """
+    Set org_domain on a MultiTenantEnforcerWrapper that doesn't have one yet.
+    No-op for other enforcer types (OrgAwareEnforcer, base Casbin enforcer).
+    """
+    if isinstance(enforcer, MultiTenantEnforcerWrapper) and not enforcer._org_domain:
+        enforcer._org_domain = org_domain
+
+
+def unwrap_enforcer(enforcer) -> CasbinEnforcer:
+    """
+    Return the Casbin enforcer behind OrgAwareEnforcer (_base) or MultiTenantEnforcerWrapper
+    (enforcer), or the argument itself if it is already a Casbin enforcer.
+    Checks against it take the domain explicitly: enforce(sub, dom, obj, act).
+    """
+    return getattr(enforcer, '_base', None) or getattr(enforcer, 'enforcer', enforcer)
+
+
 def create_enforcer_with_org_context(enforcer: CasbinEnforcer, org_domain: str) -> MultiTenantEnforcerWrapper:
     """
     Create an enforcer wrapper with organization context set.
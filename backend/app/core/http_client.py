@@ -0,0 +1,55 @@
+"""
+Shared outbound HTTP client.
+
+Reusing one pooled httpx.AsyncClient keeps DNS, TCP and TLS sessions to cloud
+endpoints (Azure AD, ARM, Google STS, ...) alive across requests instead of paying the
+handshake on every call.
+"""
+import asyncio
+import weakref
+from typing import Awaitable, TypeVar
+import httpx
+
+T = TypeVar("T")
+
+# One client per event loop: connections are bound to the loop they were opened on
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Return the shared AsyncClient for the running event loop.
+
+    Each loop gets its own client, so a second loop (e.g. asyncio.run() in Celery workers)
+    never replaces the application's client. Close a loop's client with close_http_client()
+    before the loop ends, or use run_with_http_client().
+    """
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None or client.is_closed:
+        client = _clients[loop] = httpx.AsyncClient(
+            http2=True,
+            timeout=httpx.Timeout(30.0),
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=50)
+        )
+    return client
+
+
+async def close_http_client():
+    """Close the running loop's shared client (called on application shutdown)"""
+    client = _clients.pop(asyncio.get_running_loop(), None)
+    if client is not None and not client.is_closed:
+        await client.aclose()
+
+
+def run_with_http_client(coro: Awaitable[T]) -> T:
+    """
+    asyncio.run() for code outside the application's event loop.
+    The shared client opened on the temporary loop is closed before the loop ends.
+    """
+    async def main():
+        try:
+            return await coro
+        finally:
+            await close_http_client()
+    return asyncio.run(main())
@@ -15,7 +15,6 @@ from pathlib import Path
 from typing import Optional, Dict, Any, List
 from cryptography.hazmat.primitives.asymmetric import rsa
 from cryptography.hazmat.primitives import serialization
-from cryptography.hazmat.backends import default_backend
 import jwt  # PyJWT
 from app.config import settings
 from app.logger import logger
@@ -31,6 +30,8 @@ class OIDCProvider:
         self._public_key: Optional[rsa.RSAPublicKey] = None
         self._key_id: str = "oidc-key-1"
         self._jwks_cache: Optional[Dict[str, Any]] = None
+        self._jwks_json: Optional[bytes] = None
+        self._openid_configuration_json: Optional[bytes] = None
         
         if key_file is None:
             storage_dir = Path(settings.PLUGINS_STORAGE_PATH).parent
@@ -48,11 +49,11 @@ class OIDCProvider:
                     data = json.load(f)
                     self._key_id = data.get('kid', self._key_id)
                     private_pem = data['private_key'].encode('utf-8')
-                    self._private_key = serialization.load_pem_private_key(
-                        private_pem,
-                        password=None,
-                        backend=default_backend()
-                    )
+                    private_key = serialization.load_pem_private_key(private_pem, password=None)
+                    # Tokens are signed RS256 with this key object (OpenSSL via cryptography)
+                    if not isinstance(private_key, rsa.RSAPrivateKey):
+                        raise ValueError(f"expected an RSA key, got {type(private_key).__name__}")
+                    self._private_key = private_key
                     self._public_key = self._private_key.public_key()
             except Exception as e:
                 logger.warning(f"Error loading keys, regenerating: {e}")
@@ -64,10 +65,11 @@ class OIDCProvider:
         """Generate new RSA key pair"""
         self._private_key = rsa.generate_private_key(
             public_exponent=65537,
-            key_size=2048,
-            backend=default_backend()
+            key_size=2048
         )
         self._public_key = self._private_key.public_key()
+        self._jwks_cache = None
+        self._jwks_json = None
         
         # Save to file
         private_pem = self._private_key.private_bytes(
@@ -102,6 +104,26 @@ class OIDCProvider:
         self._jwks_cache = {"keys": [jwk]}
         return self._jwks_cache
 
+    def get_jwks_json(self) -> bytes:
+        """Return the JWKS serialized once, for serving as a response body"""
+        if self._jwks_json is None:
+            self._jwks_json = json.dumps(self.get_jwks(), separators=(",", ":")).encode()
+        return self._jwks_json
+
+    def get_openid_configuration_json(self) -> bytes:
+        """Return the OIDC discovery document, serialized once (it depends only on settings)"""
+        if self._openid_configuration_json is None:
+            self._openid_configuration_json = json.dumps({
+                "issuer": settings.OIDC_ISSUER,
+                "jwks_uri": f"{settings.OIDC_ISSUER}/.well-known/jwks.json",
+                "response_types_supported": ["id_token"],
+                "subject_types_supported": ["public"],
+                "id_token_signing_alg_values_supported": ["RS256"],
+                "token_endpoint": f"{settings.OIDC_ISSUER}/oidc/token",
+                "claims_supported": ["sub", "iss", "aud", "exp", "iat", "jti"]
+            }, separators=(",", ":")).encode()
+        return self._openid_configuration_json
+
     def create_oidc_token(self, subject: str, audience: str, expires_in: int = 3600, claims: Dict[str, Any] = None) -> str:
         """
         Create a signed ID token
@@ -127,16 +149,10 @@ class OIDCProvider:
         if claims:
             payload.update(claims)
             
-        # Get private key in PEM format for pyjwt
-        private_pem = self._private_key.private_bytes(
-            encoding=serialization.Encoding.PEM,
-            format=serialization.PrivateFormat.PKCS8,
-            encryption_algorithm=serialization.NoEncryption()
-        )
-        
+        # Sign with the already-loaded key object; PyJWT would otherwise re-parse a PEM on every call
         token = jwt.encode(
             payload,
-            private_pem,
+            self._private_key,
             algorithm="RS256",
             headers={"kid": self._key_id}
         )
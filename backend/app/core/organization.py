@@ -1,9 +1,11 @@
 """
 Organization context helpers for multi-tenancy support
 """
+import sys
+from functools import lru_cache
 from typing import Optional
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, inspect as sa_inspect
 from app.models import Organization, User
 import uuid
 
@@ -22,13 +24,13 @@ async def get_user_organization(user: User, db: AsyncSession) -> Organization:
     Raises:
         ValueError: If organization not found
     """
-    if hasattr(user, 'organization') and user.organization:
+    # Use the eager-loaded relationship (get_current_user always loads it). Checking the
+    # loaded state first avoids an implicit lazy load, which isn't allowed under asyncio.
+    if "organization" not in sa_inspect(user).unloaded and user.organization:
         return user.organization
     
-    result = await db.execute(
-        select(Organization).where(Organization.id == user.organization_id)
-    )
-    org = result.scalar_one_or_none()
+    # Identity-map lookup first; only hits the database if the org isn't in this session
+    org = await db.get(Organization, user.organization_id)
     
     if not org:
         raise ValueError(f"Organization not found for user {user.email}")
@@ -36,6 +38,13 @@ async def get_user_organization(user: User, db: AsyncSession) -> Organization:
     return org
 
 
+@lru_cache(maxsize=10_000)
+def _domain_for(org_id: uuid.UUID) -> str:
+    # The domain is derived from the immutable org ID, so entries never need invalidating.
+    # Interned so every request for an org shares one string for Casbin's dict lookups.
+    return sys.intern(str(org_id))
+
+
 def get_organization_domain(organization: Organization) -> str:
     """
     Get the domain string for Casbin enforcement.
@@ -46,7 +55,7 @@ def get_organization_domain(organization: Organization) -> str:
     Returns:
         Domain string (organization ID as string)
     """
-    return str(organization.id)
+    return _domain_for(organization.id)
 
 
 def get_organization_domain_from_id(org_id: uuid.UUID) -> str:
@@ -59,7 +68,23 @@ def get_organization_domain_from_id(org_id: uuid.UUID) -> str:
     Returns:
         Domain string (organization ID as string)
     """
-    return str(org_id)
+    return _domain_for(org_id)
+
+
+def get_user_organization_domain(user: User) -> str:
+    """
+    Get the Casbin domain string for a user's organization.
+    
+    The domain is derived from user.organization_id alone, so unlike
+    get_user_organization this never touches the session.
+    
+    Args:
+        user: The user object
+        
+    Returns:
+        Domain string (organization ID as string)
+    """
+    return _domain_for(user.organization_id)
 
 
 async def get_or_create_default_organization(db: AsyncSession) -> Organization:
@@ -12,6 +12,8 @@ Casbin Storage:
 - act = action or action:environment (e.g., "list", "create:development")
 """
 
+from functools import lru_cache
+import re
 from typing import Dict, List, Optional
 
 # Permission metadata structure
@@ -1138,6 +1140,13 @@ def get_all_permissions() -> List[PermissionDefinition]:
     """Get all permissions"""
     return PERMISSIONS
 
+# Strips a BU-scoped prefix (format: "bu:{uuid}:scope:resource:action")
+_BU_PREFIX_RE = re.compile(
+    r'^bu:[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}:',
+    re.IGNORECASE
+)
+
+@lru_cache(maxsize=1024)
 def parse_permission_slug(slug: str) -> tuple[str, str]:
     """
     Parse permission slug into (obj, act) for Casbin storage.
@@ -1149,11 +1158,8 @@ def parse_permission_slug(slug: str) -> tuple[str, str]:
         "user:profile:read" -> ("profile", "read")
         "business_unit:deployments:history:read" -> ("deployments", "history:read")
     """
-    import re
-    
-    # Strip BU-scoped prefix if present (format: "bu:{uuid}:scope:resource:action")
-    bu_prefix_pattern = r'^bu:[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}:'
-    slug = re.sub(bu_prefix_pattern, '', slug, flags=re.IGNORECASE)
+    # Strip BU-scoped prefix if present; results are memoized since slugs come from a fixed set
+    slug = _BU_PREFIX_RE.sub('', slug)
     
     parts = slug.split(":")
     
@@ -1185,6 +1191,7 @@ def parse_permission_slug(slug: str) -> tuple[str, str]:
     else:
         raise ValueError(f"Invalid permission slug format: {slug}")
 
+@lru_cache(maxsize=1024)
 def get_permission_scope(permission_slug: str) -> str:
     """
     Get the scope of a permission (platform, business_unit, or user).
@@ -1209,6 +1216,17 @@ def get_permission_scope(permission_slug: str) -> str:
     # Default to business_unit for backward compatibility
     return "business_unit"
 
+@lru_cache(maxsize=1024)
+def resolve_permission(permission_slug: str) -> tuple[str, str, str]:
+    """
+    Resolve a slug to (scope, obj, act) in one memoized lookup for the authorization hot path.
+    
+    Raises:
+        ValueError: If the slug cannot be parsed
+    """
+    obj, act = parse_permission_slug(permission_slug)
+    return get_permission_scope(permission_slug), obj, act
+
 def is_platform_permission(permission_slug: str) -> bool:
     """Check if a permission is platform-level (no BU required)"""
     return get_permission_scope(permission_slug) == "platform"
@@ -0,0 +1,76 @@
+"""
+In-process TTL cache.
+
+Used as a first-level cache in front of Redis for short-lived cloud credentials
+and other values that are expensive to obtain but safe to reuse until they expire.
+"""
+import asyncio
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Any, Dict, Hashable, List, Optional
+
+
+class TTLCache:
+    """
+    Size-bounded LRU mapping whose entries expire after a per-entry TTL.
+
+    Intended to be used from the event loop only (not thread-safe).
+    """
+
+    def __init__(self, maxsize: int = 1024):
+        self._maxsize = maxsize
+        self._data: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+        # key -> [lock, number of coroutines holding or waiting on it]
+        self._locks: Dict[Hashable, List[Any]] = {}
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value, or None if missing or expired"""
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if time.monotonic() >= expires_at:
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: float) -> None:
+        """Store a value for `ttl` seconds. Non-positive TTLs drop the key."""
+        if ttl <= 0:
+            self._data.pop(key, None)
+            return
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self._maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key: Hashable) -> None:
+        """Remove a key if present"""
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        """Remove all entries"""
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    @asynccontextmanager
+    async def locked(self, key: Hashable):
+        """
+        Serialize refreshes of a single key so concurrent misses trigger one fetch.
+        Callers should re-check the cache after acquiring the lock.
+        """
+        entry = self._locks.get(key)
+        if entry is None:
+            entry = self._locks[key] = [asyncio.Lock(), 0]
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                self._locks.pop(key, None)
@@ -0,0 +1,38 @@
+"""
+Version ordering for plugin versions.
+
+Plugin versions are free-form strings from the manifest, usually semver ("1.2.0",
+"2.0.0-beta.1") and occasionally PEP 440 style ("1.0.0rc1").
+"""
+import re
+from functools import lru_cache
+
+_RELEASE_RE = re.compile(r"(\d+(?:\.\d+)*)(.*)", re.DOTALL)
+_IDENTIFIER_RE = re.compile(r"\d+|[^\W\d_]+")
+
+
+@lru_cache(maxsize=4096)
+def version_key(version: str) -> tuple:
+    """
+    Sort key following semver precedence:
+    - release numbers compare numerically ("10.0.0" > "2.0.0", "1.0" == "1.0.0")
+    - a pre-release sorts below its release ("1.0.0-beta" < "1.0.0", "1.0.0rc1" < "1.0.0")
+    - pre-release identifiers compare numerically when numeric ("beta.2" < "beta.10")
+    - build metadata ("+build.5") and a leading "v" are ignored
+    Strings without a release number sort below all numbered versions. Memoized per string.
+    """
+    text = version.strip().lstrip("vV").split("+", 1)[0]
+    match = _RELEASE_RE.match(text)
+    release, suffix = match.groups() if match else ("", text)
+    
+    numbers = [int(part) for part in release.split(".")] if release else []
+    while numbers and numbers[-1] == 0:
+        numbers.pop()
+    
+    identifiers = _IDENTIFIER_RE.findall(suffix)
+    if not identifiers:
+        return (tuple(numbers), (1,))
+    return (
+        tuple(numbers),
+        (0,) + tuple((0, int(part), "") if part.isdigit() else (1, 0, part.lower()) for part in identifiers)
+    )
@@ -0,0 +1,37 @@
+"""
+Middleware serving the public OIDC documents before the rest of the stack
+"""
+from starlette.responses import Response
+from starlette.types import ASGIApp, Receive, Scope, Send
+from app.core.oidc import oidc_provider
+
+# Cloud providers fetch these on token verification; the bodies only change on restart
+_STATIC_HEADERS = {"Cache-Control": "public, max-age=300"}
+
+_DOCUMENTS = {
+    "/.well-known/jwks.json": oidc_provider.get_jwks_json,
+    "/.well-known/openid-configuration": oidc_provider.get_openid_configuration_json,
+}
+
+
+class WellKnownDocumentsMiddleware:
+    """
+    Answer GET requests for the JWKS and OIDC discovery documents with their
+    pre-serialized bodies, skipping the audit middleware, routing and dependency
+    resolution. Register it last so it is the outermost middleware.
+    
+    The routes in app.api.oidc still serve the same documents (and appear in the
+    OpenAPI schema) if this middleware is not installed.
+    """
+    
+    def __init__(self, app: ASGIApp):
+        self.app = app
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] == "http" and scope["method"] == "GET":
+            document = _DOCUMENTS.get(scope["path"])
+            if document is not None:
+                response = Response(document(), media_type="application/json", headers=_STATIC_HEADERS)
+                await response(scope, receive, send)
+                return
+        await self.app(scope, receive, send)
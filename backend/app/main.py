@@ -13,6 +13,7 @@ from app.config import settings
 from app.logger import logger
 from app.core.db_init import init_db
 from app.core.audit_middleware import AuditLoggingMiddleware
+from app.core.well_known_middleware import WellKnownDocumentsMiddleware
 
 # Import all models to register them with Base for table creation
 from app.models import *  # noqa: F403, F405
@@ -97,6 +98,17 @@ async def lifespan(app: FastAPI):
         logger.warning(f"Failed to create business units tables (non-critical): {e}")
         # Don't raise - tables are optional for functionality
     
+    # Record icon locations for plugin versions uploaded before they were stored
+    try:
+        from app.database import AsyncSessionLocal
+        from app.core.db_init import backfill_plugin_icon_paths
+        
+        async with AsyncSessionLocal() as db:
+            await backfill_plugin_icon_paths(db)
+    except Exception as e:
+        logger.warning(f"Failed to backfill plugin icon paths (non-critical): {e}")
+        # Don't raise - listing falls back to the default icon location
+    
     # Initialize database with default data (admin user, roles, permissions)
     try:
         from app.database import AsyncSessionLocal
@@ -120,6 +132,9 @@ async def lifespan(app: FastAPI):
     
     # Shutdown
     logger.info("Shutting down DevPlatform IDP...")
+    
+    from app.core.http_client import close_http_client
+    await close_http_client()
 
 
 # Create FastAPI application
@@ -164,6 +179,9 @@ app.add_middleware(
 # Add audit logging middleware
 app.add_middleware(AuditLoggingMiddleware)
 
+# Serve the OIDC discovery/JWKS documents ahead of the other middleware (added last = outermost)
+app.add_middleware(WellKnownDocumentsMiddleware)
+
 # Mount static files for plugin storage and avatars
 # Get the backend directory (parent of app directory)
 backend_dir = Path(__file__).parent.parent
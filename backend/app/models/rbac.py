@@ -4,6 +4,7 @@ from sqlalchemy.orm import relationship, Mapped, mapped_column
 from sqlalchemy.sql import func
 import uuid
 from datetime import datetime
+from functools import cached_property
 from typing import List, Optional
 from app.database import Base
 
@@ -52,6 +53,11 @@ class User(Base):
     business_unit_memberships: Mapped[List["BusinessUnitMember"]] = relationship("BusinessUnitMember", back_populates="user")
     business_unit_group_memberships: Mapped[List["BusinessUnitGroupMember"]] = relationship("BusinessUnitGroupMember", back_populates="user")
 
+    @cached_property
+    def id_str(self) -> str:
+        """User ID as used for Casbin subjects, stringified once per instance"""
+        return str(self.id)
+
 class RefreshToken(Base):
     __tablename__ = "refresh_tokens"
 
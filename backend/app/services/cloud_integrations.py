@@ -2,16 +2,94 @@ import boto3
 import json
 import time
 import httpx
+import jwt
 import logging
+import re
+from datetime import datetime
+from urllib.parse import urlencode
 from botocore.exceptions import ClientError
 from app.config import settings
 from app.core.redis_client import RedisClient
 from app.core.oidc import oidc_provider
+from app.core.ttl_cache import TTLCache
+from app.core.http_client import get_http_client
+from app.core.backpressure import admission
 from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
 from typing import Dict, Any, Optional
 
 logger = logging.getLogger(__name__)
 
+# Refresh AWS credentials this many seconds before STS says they expire
+AWS_CREDENTIALS_REFRESH_MARGIN = 120
+
+# Process-local credential cache keyed by (user_id, role_arn, duration_seconds).
+# Sits in front of Redis so repeat calls skip both the OIDC signing and the STS round-trip.
+_aws_credentials_cache = TTLCache(maxsize=1024)
+
+# Azure AD tokens are reused until this many seconds before `expires_in` runs out
+AZURE_TOKEN_REFRESH_MARGIN = 120
+AZURE_MANAGEMENT_SCOPE = "https://management.azure.com/.default"
+
+# Settings are fixed for the lifetime of the process, so build the Azure AD request constants once
+AZURE_FEDERATION_AUDIENCE = "api://AzureADTokenExchange"
+AZURE_TOKEN_URL = f"https://login.microsoftonline.com/{settings.AZURE_TENANT_ID}/oauth2/v2.0/token"
+AZURE_TOKEN_HEADERS = {"Content-Type": "application/x-www-form-urlencoded"}
+# Constant part of the client-assertion form body; only scope and assertion vary per call
+_AZURE_FORM_PREFIX = urlencode({
+    "client_id": settings.AZURE_CLIENT_ID,
+    "client_assertion_type": "urn:ietf:params:oauth:client-assertion-type:jwt-bearer",
+    "grant_type": "client_credentials"
+}).encode()
+
+# Process-local Azure token cache keyed by (user_id, scope)
+_azure_token_cache = TTLCache(maxsize=1024)
+
+# GCP access tokens are reused until this many seconds before they expire
+GCP_TOKEN_REFRESH_MARGIN = 60
+
+# Process-local GCP token cache keyed by (user_id, service_account_email)
+_gcp_token_cache = TTLCache(maxsize=1024)
+
+
+def _parse_rfc3339(value: str) -> float:
+    """
+    Parse an RFC 3339 timestamp from a Google API (e.g. "2024-01-01T12:00:00.123456789Z")
+    into epoch seconds. datetime.fromisoformat() only accepts "Z" and nanosecond fractions
+    from Python 3.11, so normalize the offset and drop the fraction first.
+    """
+    return datetime.fromisoformat(re.sub(r"\.\d+", "", value.replace("Z", "+00:00"))).timestamp()
+
+
+def _gcp_config_error() -> Optional[str]:
+    """Describe what is missing from the GCP Workload Identity settings, or None if complete"""
+    if not settings.GCP_PROJECT_NUMBER or not settings.GCP_PROJECT_ID:
+        return "GCP configuration missing (PROJECT_NUMBER and PROJECT_ID required)"
+    if not settings.GCP_WORKLOAD_IDENTITY_POOL_ID or not settings.GCP_WORKLOAD_IDENTITY_PROVIDER_ID:
+        return "GCP Workload Identity configuration missing (WORKLOAD_IDENTITY_POOL_ID and WORKLOAD_IDENTITY_PROVIDER_ID required)"
+    if not settings.OIDC_ISSUER:
+        return "OIDC_ISSUER not configured. This is required for GCP Workload Identity Federation."
+    return None
+
+
+# GCP Workload Identity request constants, also built once from the fixed settings
+GCP_CONFIG_ERROR = _gcp_config_error()
+# Uses PROJECT_NUMBER (required by GCP Workload Identity)
+GCP_WORKLOAD_IDENTITY_AUDIENCE = f"//iam.googleapis.com/projects/{settings.GCP_PROJECT_NUMBER}/locations/global/workloadIdentityPools/{settings.GCP_WORKLOAD_IDENTITY_POOL_ID}/providers/{settings.GCP_WORKLOAD_IDENTITY_PROVIDER_ID}"
+GCP_STS_URL = "https://sts.googleapis.com/v1/token"
+GCP_IMPERSONATE_URL = "https://iamcredentials.googleapis.com/v1/projects/-/serviceAccounts/{}:generateAccessToken"
+
+# AssumeRoleWithWebIdentity is unsigned, so one process-wide STS client serves every user.
+# boto3 clients are thread-safe and keep their connection pool across requests.
+_sts_client = None
+
+
+def _get_sts_client():
+    global _sts_client
+    if _sts_client is None:
+        _sts_client = boto3.client('sts', region_name=settings.AWS_REGION)
+    return _sts_client
+
 class CloudIntegrationService:
     """
     Service to handle Cloud Provider integrations using Workload Identity Federation.
@@ -26,19 +104,48 @@ class CloudIntegrationService:
     ) -> Dict[str, Any]:
         """
         Get AWS temporary credentials.
+        Served from the in-process cache first, then Redis, then STS.
         """
         target_role_arn = role_arn or settings.AWS_ROLE_ARN
         
         if not target_role_arn:
             # Fallback or error
             raise HTTPException(status_code=400, detail="AWS Role ARN not configured")
+        
+        local_key = (user_id, target_role_arn, duration_seconds)
+        cached = _aws_credentials_cache.get(local_key)
+        if cached:
+            return cached
+        
+        # Only one coroutine per key performs the exchange; the rest reuse its result
+        async with _aws_credentials_cache.locked(local_key):
+            cached = _aws_credentials_cache.get(local_key)
+            if cached:
+                return cached
             
+            result = await CloudIntegrationService._fetch_aws_credentials(
+                user_id, target_role_arn, duration_seconds
+            )
+            _aws_credentials_cache.set(
+                local_key,
+                result,
+                ttl=result["expiration_ts"] - AWS_CREDENTIALS_REFRESH_MARGIN - time.time()
+            )
+            return result
+
+    @staticmethod
+    async def _fetch_aws_credentials(
+        user_id: str,
+        target_role_arn: str,
+        duration_seconds: int
+    ) -> Dict[str, Any]:
+        """Load AWS credentials from Redis or exchange a fresh OIDC token with STS"""
         cache_key = f"aws_creds:{user_id}:{target_role_arn}"
         cached = await RedisClient.get_json(cache_key)
         
         if cached:
             expiration = cached.get("expiration_ts")
-            if expiration and time.time() < expiration - 300:
+            if expiration and time.time() < expiration - AWS_CREDENTIALS_REFRESH_MARGIN:
                 return cached
 
         oidc_token = oidc_provider.create_oidc_token(
@@ -48,15 +155,16 @@ class CloudIntegrationService:
         )
 
         try:
-            # Note: In production, run this blocking call in a threadpool
-            sts = boto3.client('sts', region_name=settings.AWS_REGION)
-            
-            response = sts.assume_role_with_web_identity(
-                RoleArn=target_role_arn,
-                RoleSessionName=f"devplatform-{user_id}",
-                WebIdentityToken=oidc_token,
-                DurationSeconds=duration_seconds
-            )
+            # STS throttles per account: arn:aws:iam::<account>:role/<name>
+            account_id = target_role_arn.split(":")[4] if target_role_arn.count(":") >= 5 else None
+            async with admission("aws-sts", account_id):
+                response = await run_in_threadpool(
+                    _get_sts_client().assume_role_with_web_identity,
+                    RoleArn=target_role_arn,
+                    RoleSessionName=f"devplatform-{user_id}",
+                    WebIdentityToken=oidc_token,
+                    DurationSeconds=duration_seconds
+                )
             
             creds = response['Credentials']
             expiration_ts = creds['Expiration'].timestamp()
@@ -91,28 +199,47 @@ class CloudIntegrationService:
     ) -> Dict[str, Any]:
         """
         Get GCP Access Token via Workload Identity Federation.
+        Served from the in-process cache first, then Redis, then Google STS.
         """
         target_sa_email = service_account_email or settings.GCP_SERVICE_ACCOUNT_EMAIL
         
+        local_key = (user_id, target_sa_email)
+        cached = _gcp_token_cache.get(local_key)
+        if cached:
+            return cached
+        
+        # Only one coroutine per key performs the exchange; the rest reuse its result
+        async with _gcp_token_cache.locked(local_key):
+            cached = _gcp_token_cache.get(local_key)
+            if cached:
+                return cached
+            
+            result = await CloudIntegrationService._fetch_gcp_access_token(user_id, target_sa_email)
+            _gcp_token_cache.set(
+                local_key,
+                result,
+                ttl=result["expiration_ts"] - GCP_TOKEN_REFRESH_MARGIN - time.time()
+            )
+            return result
+
+    @staticmethod
+    async def _fetch_gcp_access_token(
+        user_id: str,
+        target_sa_email: str
+    ) -> Dict[str, Any]:
+        """Load a GCP token from Redis or exchange a fresh OIDC token with Google STS"""
         cache_key = f"gcp_token:{user_id}:{target_sa_email}"
         cached = await RedisClient.get_json(cache_key)
         
         if cached:
-            if time.time() < cached.get("expiration_ts", 0) - 60:
+            if time.time() < cached.get("expiration_ts", 0) - GCP_TOKEN_REFRESH_MARGIN:
                 return cached
 
         # Validate GCP configuration
-        if not settings.GCP_PROJECT_NUMBER or not settings.GCP_PROJECT_ID:
-             raise HTTPException(status_code=500, detail="GCP configuration missing (PROJECT_NUMBER and PROJECT_ID required)")
+        if GCP_CONFIG_ERROR:
+            raise HTTPException(status_code=500, detail=GCP_CONFIG_ERROR)
         
-        if not settings.GCP_WORKLOAD_IDENTITY_POOL_ID or not settings.GCP_WORKLOAD_IDENTITY_PROVIDER_ID:
-            raise HTTPException(status_code=500, detail="GCP Workload Identity configuration missing (WORKLOAD_IDENTITY_POOL_ID and WORKLOAD_IDENTITY_PROVIDER_ID required)")
-        
-        if not settings.OIDC_ISSUER:
-            raise HTTPException(status_code=500, detail="OIDC_ISSUER not configured. This is required for GCP Workload Identity Federation.")
-
-        # Use PROJECT_NUMBER for audience (required by GCP Workload Identity)
-        audience = f"//iam.googleapis.com/projects/{settings.GCP_PROJECT_NUMBER}/locations/global/workloadIdentityPools/{settings.GCP_WORKLOAD_IDENTITY_POOL_ID}/providers/{settings.GCP_WORKLOAD_IDENTITY_PROVIDER_ID}"
+        audience = GCP_WORKLOAD_IDENTITY_AUDIENCE
         
         try:
             oidc_token = oidc_provider.create_oidc_token(
@@ -120,179 +247,194 @@ class CloudIntegrationService:
                 audience=audience, 
                 expires_in=3600
             )
-            
-            # Verify token was created correctly (decode to check issuer claim)
-            try:
-                import jwt
-                decoded = jwt.decode(oidc_token, options={"verify_signature": False})
-                token_issuer = decoded.get("iss")
-                if token_issuer != settings.OIDC_ISSUER:
-                    logger.warning(f"Token issuer mismatch: token has '{token_issuer}' but expected '{settings.OIDC_ISSUER}'")
-            except Exception as decode_error:
-                logger.warning(f"Could not decode token for verification: {decode_error}")
-                
         except Exception as e:
             raise HTTPException(
                 status_code=500, 
                 detail=f"Failed to create OIDC token: {str(e)}. Check OIDC_ISSUER configuration: {settings.OIDC_ISSUER}"
             )
 
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            sts_url = "https://sts.googleapis.com/v1/token"
-            sts_payload = {
-                "grant_type": "urn:ietf:params:oauth:grant-type:token-exchange",
-                "audience": audience,
-                "scope": "https://www.googleapis.com/auth/cloud-platform",
-                "requested_token_type": "urn:ietf:params:oauth:token-type:access_token",
-                "subject_token": oidc_token,
-                "subject_token_type": "urn:ietf:params:oauth:token-type:jwt"
-            }
-            
+        client = get_http_client()
+        sts_url = GCP_STS_URL
+        sts_payload = {
+            "grant_type": "urn:ietf:params:oauth:grant-type:token-exchange",
+            "audience": audience,
+            "scope": "https://www.googleapis.com/auth/cloud-platform",
+            "requested_token_type": "urn:ietf:params:oauth:token-type:access_token",
+            "subject_token": oidc_token,
+            "subject_token_type": "urn:ietf:params:oauth:token-type:jwt"
+        }
+        
+        try:
+            sts_resp = await client.post(sts_url, data=sts_payload)
+        except httpx.RequestError as e:
+            raise HTTPException(
+                status_code=500, 
+                detail=f"Failed to connect to GCP STS service: {str(e)}. Check network connectivity and GCP service availability."
+            )
+        
+        if sts_resp.status_code != 200:
+            error_detail = sts_resp.text
+            error_code = None
             try:
-                sts_resp = await client.post(sts_url, data=sts_payload)
-            except httpx.RequestError as e:
-                raise HTTPException(
-                    status_code=500, 
-                    detail=f"Failed to connect to GCP STS service: {str(e)}. Check network connectivity and GCP service availability."
-                )
+                error_json = sts_resp.json()
+                error_code = error_json.get("error")
+                error_detail = error_json.get("error_description", error_json.get("error", error_detail))
+            except:
+                pass
             
-            if sts_resp.status_code != 200:
-                error_detail = sts_resp.text
-                error_code = None
-                try:
-                    error_json = sts_resp.json()
-                    error_code = error_json.get("error")
-                    error_detail = error_json.get("error_description", error_json.get("error", error_detail))
-                except:
-                    pass
-                
-                # Log full error for debugging
-                logger.error(f"GCP STS Error Response: Status={sts_resp.status_code}, Error={error_code}, Detail={error_detail}")
-                logger.error(f"Request payload audience: {audience}")
-                logger.error(f"OIDC Issuer: {settings.OIDC_ISSUER}")
-                logger.error(f"Token issuer claim should be: {settings.OIDC_ISSUER}")
-                
-                # Try to decode the token to verify issuer claim
+            # Log full error for debugging
+            logger.error(
+                "GCP STS Error Response: Status=%s, Error=%s, Detail=%s, audience=%s, OIDC issuer=%s",
+                sts_resp.status_code, error_code, error_detail, audience, settings.OIDC_ISSUER
+            )
+            
+            # Decode the token we sent only when someone will read the claims
+            if logger.isEnabledFor(logging.DEBUG):
                 try:
-                    import jwt
                     decoded = jwt.decode(oidc_token, options={"verify_signature": False})
-                    logger.error(f"Token issuer claim: {decoded.get('iss')}")
-                    logger.error(f"Token audience claim: {decoded.get('aud')}")
-                    logger.error(f"Token subject claim: {decoded.get('sub')}")
+                    logger.debug(
+                        "Token claims: iss=%s aud=%s sub=%s",
+                        decoded.get('iss'), decoded.get('aud'), decoded.get('sub')
+                    )
                 except Exception:
                     pass
-                
-                # Provide more helpful error messages
-                if "invalid_grant" in error_detail.lower() and "issuer" in error_detail.lower():
-                    raise HTTPException(
-                        status_code=500,
-                        detail=f"GCP STS Error: {error_detail}. "
-                               f"This usually means: "
-                               f"1) The OIDC issuer URL in GCP Workload Identity Pool doesn't match '{settings.OIDC_ISSUER}', "
-                               f"2) GCP cannot reach the issuer URL from their servers (check firewall/DNS), "
-                               f"3) The issuer URL changed but GCP wasn't updated. "
-                               f"Verify in GCP Console: IAM & Admin > Workload Identity Pools > {settings.GCP_WORKLOAD_IDENTITY_POOL_ID} > {settings.GCP_WORKLOAD_IDENTITY_PROVIDER_ID} "
-                               f"and ensure the issuer URL exactly matches: {settings.OIDC_ISSUER}"
-                    )
-                else:
-                    raise HTTPException(
-                        status_code=500,
-                        detail=f"GCP STS Error ({error_code}): {error_detail}. "
-                               f"Audience: {audience}, "
-                               f"OIDC Issuer: {settings.OIDC_ISSUER}. "
-                               f"Full response: {sts_resp.text[:500]}"
-                    )
-            
-            federated_token = sts_resp.json()["access_token"]
             
-            # Impersonate Service Account
-            sa_url = f"https://iamcredentials.googleapis.com/v1/projects/-/serviceAccounts/{target_sa_email}:generateAccessToken"
-            
-            sa_resp = await client.post(
-                sa_url,
-                headers={"Authorization": f"Bearer {federated_token}"},
-                json={
-                    "scope": ["https://www.googleapis.com/auth/cloud-platform"],
-                    "lifetime": "3600s"
-                }
-            )
-            
-            if sa_resp.status_code != 200:
-                raise HTTPException(status_code=500, detail=f"GCP SA Impersonation Error: {sa_resp.text}")
-                
-            data = sa_resp.json()
-            access_token = data["accessToken"]
-            expiration_ts = time.time() + 3500 
-            
-            result = {
-                "access_token": access_token,
-                "token_type": "Bearer",
-                "expiration_ts": expiration_ts,
-                # For compatibility
-                "type": "gcp_access_token",
-                "expires_in": 3500
+            # Provide more helpful error messages
+            if "invalid_grant" in error_detail.lower() and "issuer" in error_detail.lower():
+                raise HTTPException(
+                    status_code=500,
+                    detail=f"GCP STS Error: {error_detail}. "
+                           f"This usually means: "
+                           f"1) The OIDC issuer URL in GCP Workload Identity Pool doesn't match '{settings.OIDC_ISSUER}', "
+                           f"2) GCP cannot reach the issuer URL from their servers (check firewall/DNS), "
+                           f"3) The issuer URL changed but GCP wasn't updated. "
+                           f"Verify in GCP Console: IAM & Admin > Workload Identity Pools > {settings.GCP_WORKLOAD_IDENTITY_POOL_ID} > {settings.GCP_WORKLOAD_IDENTITY_PROVIDER_ID} "
+                           f"and ensure the issuer URL exactly matches: {settings.OIDC_ISSUER}"
+                )
+            else:
+                raise HTTPException(
+                    status_code=500,
+                    detail=f"GCP STS Error ({error_code}): {error_detail}. "
+                           f"Audience: {audience}, "
+                           f"OIDC Issuer: {settings.OIDC_ISSUER}. "
+                           f"Full response: {sts_resp.text[:500]}"
+                )
+        
+        federated_token = sts_resp.json()["access_token"]
+        
+        # Impersonate Service Account
+        sa_url = GCP_IMPERSONATE_URL.format(target_sa_email)
+        
+        sa_resp = await client.post(
+            sa_url,
+            headers={"Authorization": f"Bearer {federated_token}"},
+            json={
+                "scope": ["https://www.googleapis.com/auth/cloud-platform"],
+                "lifetime": "3600s"
             }
+        )
+        
+        if sa_resp.status_code != 200:
+            raise HTTPException(status_code=500, detail=f"GCP SA Impersonation Error: {sa_resp.text}")
             
-            await RedisClient.set_json(cache_key, result, expire=3500)
-            return result
+        data = sa_resp.json()
+        access_token = data["accessToken"]
+        now = time.time()
+        try:
+            expires_in = int(_parse_rfc3339(data["expireTime"]) - now) - 100
+        except (KeyError, TypeError, ValueError, AttributeError):
+            logger.warning("Unparseable GCP expireTime %r, assuming a 3500s token lifetime", data.get("expireTime"))
+            expires_in = 3500
+        
+        result = {
+            "access_token": access_token,
+            "token_type": "Bearer",
+            "expiration_ts": now + expires_in,
+            # For compatibility
+            "type": "gcp_access_token",
+            "expires_in": expires_in
+        }
+        
+        if expires_in > 0:
+            await RedisClient.set_json(cache_key, result, expire=expires_in)
+        return result
 
     @staticmethod
-    async def get_azure_token(user_id: str) -> Dict[str, Any]:
+    async def get_azure_token(
+        user_id: str,
+        scope: str = AZURE_MANAGEMENT_SCOPE
+    ) -> Dict[str, Any]:
         """
         Get Azure Access Token via Federated Credential.
+        Served from the in-process cache first, then Redis, then Azure AD.
         """
-        cache_key = f"azure_token:{user_id}"
+        local_key = (user_id, scope)
+        cached = _azure_token_cache.get(local_key)
+        if cached:
+            return cached
+        
+        async with _azure_token_cache.locked(local_key):
+            cached = _azure_token_cache.get(local_key)
+            if cached:
+                return cached
+            
+            result = await CloudIntegrationService._fetch_azure_token(user_id, scope)
+            _azure_token_cache.set(
+                local_key,
+                result,
+                ttl=result["expiration_ts"] - AZURE_TOKEN_REFRESH_MARGIN - time.time()
+            )
+            return result
+
+    @staticmethod
+    async def _fetch_azure_token(user_id: str, scope: str) -> Dict[str, Any]:
+        """Load an Azure token from Redis or exchange a fresh OIDC token with Azure AD"""
+        cache_key = f"azure_token:{user_id}:{scope}"
         cached = await RedisClient.get_json(cache_key)
         
         if cached:
-            if time.time() < cached.get("expiration_ts", 0) - 60:
+            if time.time() < cached.get("expiration_ts", 0) - AZURE_TOKEN_REFRESH_MARGIN:
                 return cached
 
-        audience = "api://AzureADTokenExchange"
-        
         oidc_token = oidc_provider.create_oidc_token(
             subject=user_id,
-            audience=audience,
+            audience=AZURE_FEDERATION_AUDIENCE,
             expires_in=3600
         )
 
-        async with httpx.AsyncClient() as client:
-            tenant_id = settings.AZURE_TENANT_ID
-            client_id = settings.AZURE_CLIENT_ID
-            scope = "https://management.azure.com/.default"
-            
-            token_url = f"https://login.microsoftonline.com/{tenant_id}/oauth2/v2.0/token"
-            
-            data = {
-                "client_id": client_id,
-                "scope": scope,
-                "client_assertion_type": "urn:ietf:params:oauth:client-assertion-type:jwt-bearer",
-                "client_assertion": oidc_token,
-                "grant_type": "client_credentials"
-            }
-            
-            resp = await client.post(token_url, data=data)
-            
-            if resp.status_code != 200:
-                raise HTTPException(status_code=500, detail=f"Azure Token Error: {resp.text}")
-                
-            token_data = resp.json()
-            access_token = token_data["access_token"]
-            expires_in = int(token_data.get("expires_in", 3600))
-            
-            expiration_ts = time.time() + expires_in
-            
-            result = {
-                "access_token": access_token,
-                "token_type": "Bearer",
-                "expiration_ts": expiration_ts,
-                # For compatibility
-                "azure_access_token": access_token,
-                "azure_client_id": client_id,
-                "azure_tenant_id": tenant_id
-            }
+        client = get_http_client()
+        tenant_id = settings.AZURE_TENANT_ID
+        client_id = settings.AZURE_CLIENT_ID
+        
+        body = _AZURE_FORM_PREFIX + b"&" + urlencode({
+            "scope": scope,
+            "client_assertion": oidc_token
+        }).encode()
+        
+        async with admission("azure-ad", tenant_id) as slot:
+            resp = await client.post(AZURE_TOKEN_URL, content=body, headers=AZURE_TOKEN_HEADERS)
+            slot.record_status(resp.status_code)
+        
+        if resp.status_code != 200:
+            raise HTTPException(status_code=500, detail=f"Azure Token Error: {resp.text}")
             
-            await RedisClient.set_json(cache_key, result, expire=expires_in)
-            return result
+        token_data = resp.json()
+        access_token = token_data["access_token"]
+        expires_in = int(token_data.get("expires_in", 3600))
+        
+        expiration_ts = time.time() + expires_in
+        
+        result = {
+            "access_token": access_token,
+            "token_type": "Bearer",
+            "expiration_ts": expiration_ts,
+            # For compatibility
+            "azure_access_token": access_token,
+            "azure_client_id": client_id,
+            "azure_tenant_id": tenant_id
+        }
+        
+        await RedisClient.set_json(cache_key, result, expire=expires_in)
+        return result
 
 cloud_service = CloudIntegrationService()
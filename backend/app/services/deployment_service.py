@@ -30,7 +30,7 @@ class DeploymentService:
         self, user: User, deployment: Deployment, action: str
     ) -> bool:
         """Check if user has permission for action on deployment"""
-        user_id = str(user.id)
+        user_id = user.id_str
         
         # Check if user owns the deployment
         owns_deployment = deployment.user_id == user.id
@@ -80,7 +80,7 @@ class DeploymentService:
         """List deployments with filters and pagination"""
         from sqlalchemy import or_
         
-        user_id = str(user.id)
+        user_id = user.id_str
         skip = pagination.get("skip", 0)
         limit = pagination.get("limit", 50)
         
@@ -187,7 +187,7 @@ class DeploymentService:
         self, user: User, deployment_data: DeploymentCreate
     ) -> Deployment:
         """Create a new deployment"""
-        user_id = str(user.id)
+        user_id = user.id_str
         if not self.enforcer.enforce(user_id, "deployments", "create"):
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Permission denied")
         
@@ -1,6 +1,7 @@
 """Git service for GitOps workflow"""
 import os
 import shutil
+import threading
 from pathlib import Path
 from typing import Dict, Optional
 try:
@@ -23,6 +24,8 @@ class GitService:
         self.work_dir = Path(settings.GIT_WORK_DIR if hasattr(settings, 'GIT_WORK_DIR') else "./storage/git-repos")
         self.work_dir.mkdir(parents=True, exist_ok=True)
         self.github_token = settings.GITHUB_TOKEN if hasattr(settings, 'GITHUB_TOKEN') else ""
+        self._locks: Dict[tuple, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
     
     def _get_authenticated_url(self, repo_url: str, token: Optional[str] = None) -> str:
         """Convert repo URL to authenticated HTTPS URL if token is available"""
@@ -342,6 +345,34 @@ class GitService:
             logger.error(f"Failed to delete branch {branch}: {e}", exc_info=True)
             raise
     
+    def _get_lock(self, *key) -> threading.Lock:
+        """Get the lock for a repository's mirror (repo_url) or one of its branches (repo_url, branch)"""
+        with self._locks_guard:
+            return self._locks.setdefault(key, threading.Lock())
+    
+    def _sync_mirror(self, repo_url: str, auth_url: str) -> Path:
+        """
+        Create or update a persistent mirror of a repository under work_dir/mirrors.
+        
+        The first call clones it; later calls fetch only new objects. The token is passed
+        per command and never stored in the mirror's config.
+        """
+        name = re.sub(r'[^A-Za-z0-9._-]', '_', re.sub(r'^[a-z+]+://|^git@', '', repo_url))
+        mirror_dir = self.work_dir / "mirrors" / f"{name.removesuffix('.git')}.git"
+        
+        if (mirror_dir / "HEAD").exists():
+            mirror = Repo(str(mirror_dir))
+            mirror.git.fetch(auth_url, '+refs/heads/*:refs/heads/*', prune=True)
+            logger.info(f"Fetched {repo_url} into mirror {mirror_dir}")
+        else:
+            if mirror_dir.exists():
+                shutil.rmtree(mirror_dir)
+            mirror_dir.parent.mkdir(parents=True, exist_ok=True)
+            mirror = Repo.clone_from(auth_url, str(mirror_dir), bare=True)
+            mirror.remotes.origin.set_url(repo_url)
+            logger.info(f"Created mirror of {repo_url} at {mirror_dir}")
+        return mirror_dir
+    
     def initialize_and_push_plugin(
         self,
         repo_url: str,
@@ -361,6 +392,12 @@ class GitService:
         if git is None or Repo is None:
             raise ImportError("GitPython is not installed. Please install it with: pip install GitPython")
         
+        # Pushes to the same branch run one at a time instead of racing each other's force push
+        with self._get_lock(repo_url, branch):
+            self._push_plugin_branch(repo_url, branch, source_dir, commit_message)
+    
+    def _push_plugin_branch(self, repo_url: str, branch: str, source_dir: Path, commit_message: str) -> None:
+        """Clone, replace the branch contents with source_dir, commit and push (see initialize_and_push_plugin)"""
         import tempfile
         import shutil
         
@@ -369,12 +406,15 @@ class GitService:
             # Create temporary directory for repo
             temp_repo_dir = Path(tempfile.mkdtemp(prefix="plugin_upload_"))
             
-            # Clone repository (or initialize if empty)
+            # Clone repository from the local mirror (or initialize if it can't be fetched)
             auth_url = self._get_authenticated_url(repo_url)
             try:
-                # Try to clone existing repo
-                repo = Repo.clone_from(auth_url, str(temp_repo_dir), depth=1)
-                logger.info(f"Cloned repository to {temp_repo_dir}")
+                # Local clone: objects come from the mirror, only new ones are pushed
+                with self._get_lock(repo_url):
+                    mirror_dir = self._sync_mirror(repo_url, auth_url)
+                    repo = Repo.clone_from(str(mirror_dir), str(temp_repo_dir))
+                repo.remotes.origin.set_url(auth_url)
+                logger.info(f"Cloned repository to {temp_repo_dir} from mirror {mirror_dir}")
             except Exception as e:
                 # If clone fails, try to initialize new repo
                 logger.warning(f"Clone failed ({e}), initializing new repo")
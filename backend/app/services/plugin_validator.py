@@ -2,7 +2,7 @@
 import yaml
 import zipfile
 from pathlib import Path
-from typing import Dict, Tuple
+from typing import BinaryIO, Dict, Tuple
 from pydantic import BaseModel, ValidationError
 import logging
 
@@ -29,9 +29,9 @@ class PluginValidator:
     
     REQUIRED_FILES = ["plugin.yaml", "Pulumi.yaml"]
     
-    def validate_zip(self, zip_path: Path) -> Tuple[bool, str, Dict | None]:
+    def validate_zip(self, zip_path: Path | BinaryIO) -> Tuple[bool, str, Dict | None]:
         """
-        Validate a plugin ZIP file
+        Validate a plugin ZIP file (a path or a seekable file object)
         Returns (is_valid, error_message, manifest_dict)
         """
         logger.info(f"Validating ZIP file: {zip_path}")
@@ -40,13 +40,13 @@ class PluginValidator:
             with zipfile.ZipFile(zip_path, 'r') as zf:
                 file_list = zf.namelist()
                 logger.info(f"ZIP file opened successfully. Files in archive: {len(file_list)}")
-                logger.debug(f"File list: {file_list[:20]}...")  # Log first 20 files
+                logger.debug("File list: %s...", file_list[:20])  # Log first 20 files
                 
                 # Check for required files
                 logger.info(f"Checking for required files: {self.REQUIRED_FILES}")
                 for required_file in self.REQUIRED_FILES:
                     matching_files = [f for f in file_list if f.endswith(required_file)]
-                    logger.debug(f"Looking for {required_file}, found: {matching_files}")
+                    logger.debug("Looking for %s, found: %s", required_file, matching_files)
                     if not matching_files:
                         error_msg = f"Missing required file: {required_file}"
                         logger.error(error_msg)
@@ -68,12 +68,13 @@ class PluginValidator:
                     manifest_data = yaml.safe_load(f)
                 
                 logger.info(f"Loaded manifest data. Keys: {list(manifest_data.keys())}")
-                logger.debug(f"Manifest data: {manifest_data}")
+                logger.debug("Manifest data: %s", manifest_data)
                 
                 # Validate manifest schema
                 try:
                     logger.info("Validating manifest schema against PluginManifest model")
-                    manifest = PluginManifest(**manifest_data)
+                    # Pydantic builds the model's validator once at class definition; reuse it directly
+                    manifest = PluginManifest.model_validate(manifest_data)
                     logger.info(f"✓ Manifest schema valid. Entrypoint: {manifest.entrypoint}")
                 except ValidationError as e:
                     error_msg = f"Invalid manifest schema: {str(e)}"
@@ -86,7 +87,7 @@ class PluginValidator:
                 entrypoint = manifest.entrypoint
                 logger.info(f"Checking for entrypoint file: {entrypoint}")
                 matching_entrypoints = [f for f in file_list if f.endswith(entrypoint)]
-                logger.debug(f"Files matching entrypoint '{entrypoint}': {matching_entrypoints}")
+                logger.debug("Files matching entrypoint '%s': %s", entrypoint, matching_entrypoints)
                 
                 if not matching_entrypoints:
                     error_msg = f"Entrypoint file not found: {entrypoint}"
@@ -3,7 +3,8 @@ from datetime import datetime, timedelta, timezone
 from typing import Optional, Tuple
 import bcrypt
 import re
-from jose import JWTError, jwt
+import jwt
+from jwt import PyJWTError
 from app.config import settings
 
 
@@ -94,7 +95,7 @@ class SecurityService:
         try:
             payload = jwt.decode(token, self.secret_key, algorithms=[self.algorithm])
             return payload
-        except JWTError:
+        except PyJWTError:
             return None
 
 
@@ -5,6 +5,24 @@ from pathlib import Path
 from typing import BinaryIO
 from app.config import settings
 
+# Chunk size for copying plugin archives; large enough to keep the syscall count low for multi-MB ZIPs
+COPY_BUFFER_SIZE = 1024 * 1024
+
+
+def copy_stream(src: BinaryIO, dst: BinaryIO, bufsize: int = COPY_BUFFER_SIZE) -> None:
+    """Copy a binary stream into another, reading into one reusable buffer when supported"""
+    if not hasattr(src, "readinto"):
+        # e.g. SpooledTemporaryFile before Python 3.11
+        shutil.copyfileobj(src, dst, bufsize)
+        return
+    
+    view = memoryview(bytearray(bufsize))
+    while True:
+        n = src.readinto(view)
+        if not n:
+            break
+        dst.write(view[:n])
+
 class StorageService:
     """Service for storing plugin artifacts (local or cloud)"""
     
@@ -24,10 +42,27 @@ class StorageService:
         file_path = plugin_dir / "plugin.zip"
         
         with open(file_path, "wb") as f:
-            shutil.copyfileobj(file, f)
+            copy_stream(file, f)
         
         return str(file_path)
     
+    def resolve_icon_path(self, plugin_id: str, version: str, icon_path: str) -> str:
+        """
+        Locate a plugin icon and return its path relative to the version's storage directory.
+        Checks the flattened layout (extracted/) first, then the older nested and legacy layouts.
+        """
+        version_dir = self.base_path / plugin_id / version
+        for candidate in (
+            f"extracted/{icon_path}",
+            f"extracted/{plugin_id}/{icon_path}",
+            icon_path,
+            f"{plugin_id}/{icon_path}",
+        ):
+            if (version_dir / candidate).exists():
+                return candidate
+        # Fallback to most likely path (flattened structure)
+        return f"extracted/{icon_path}"
+    
     def get_plugin_path(self, plugin_id: str, version: str) -> Path:
         """Get the path to a plugin ZIP file"""
         return self.base_path / plugin_id / version / "plugin.zip"
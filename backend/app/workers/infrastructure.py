@@ -25,6 +25,7 @@ from app.services.storage import storage_service
 from app.services.pulumi_service import pulumi_service
 from app.services.crypto import crypto_service
 from app.services.cloud_integrations import CloudIntegrationService
+from app.core.http_client import run_with_http_client
 from app.services.git_service import git_service
 
 
@@ -308,7 +309,7 @@ class InfrastructureProvisionTask:
             try:
                 if cloud_provider == "aws":
                     self.log_message("INFO", f"Exchanging OIDC token for AWS credentials for user_id: {user_id}...")
-                    credentials = asyncio.run(CloudIntegrationService.get_aws_credentials(
+                    credentials = run_with_http_client(CloudIntegrationService.get_aws_credentials(
                         user_id=str(user_id),
                         duration_seconds=3600
                     ))
@@ -318,7 +319,7 @@ class InfrastructureProvisionTask:
                 
                 elif cloud_provider == "gcp":
                     self.log_message("INFO", "Exchanging OIDC token for GCP credentials...")
-                    credentials = asyncio.run(CloudIntegrationService.get_gcp_access_token(
+                    credentials = run_with_http_client(CloudIntegrationService.get_gcp_access_token(
                         user_id=str(user_id)
                     ))
                     self.log_message("INFO", "Successfully obtained GCP credentials via OIDC")
@@ -326,7 +327,7 @@ class InfrastructureProvisionTask:
                 
                 elif cloud_provider == "azure":
                     self.log_message("INFO", "Exchanging OIDC token for Azure credentials...")
-                    credentials = asyncio.run(CloudIntegrationService.get_azure_token(
+                    credentials = run_with_http_client(CloudIntegrationService.get_azure_token(
                         user_id=str(user_id)
                     ))
                     self.log_message("INFO", "Successfully obtained Azure credentials via OIDC")
@@ -841,7 +842,7 @@ class InfrastructureDestroyTask:
                 
                 if cloud_provider == "aws":
                     self.log_message("INFO", "Exchanging OIDC token for AWS credentials")
-                    credentials = asyncio.run(CloudIntegrationService.get_aws_credentials(
+                    credentials = run_with_http_client(CloudIntegrationService.get_aws_credentials(
                         user_id=str(deployment.user_id),
                         duration_seconds=3600
                     ))
@@ -850,7 +851,7 @@ class InfrastructureDestroyTask:
                 
                 elif cloud_provider == "gcp":
                     self.log_message("INFO", "Exchanging OIDC token for GCP credentials")
-                    credentials = asyncio.run(CloudIntegrationService.get_gcp_access_token(
+                    credentials = run_with_http_client(CloudIntegrationService.get_gcp_access_token(
                         user_id=str(deployment.user_id)
                     ))
                     self.log_message("INFO", "Successfully obtained GCP credentials via OIDC")
@@ -858,7 +859,7 @@ class InfrastructureDestroyTask:
                 
                 elif cloud_provider == "azure":
                     self.log_message("INFO", "Exchanging OIDC token for Azure credentials")
-                    credentials = asyncio.run(CloudIntegrationService.get_azure_token(
+                    credentials = run_with_http_client(CloudIntegrationService.get_azure_token(
                         user_id=str(deployment.user_id)
                     ))
                     self.log_message("INFO", "Successfully obtained Azure credentials via OIDC")
@@ -0,0 +1,65 @@
+"""Tests for the background git push of uploaded plugins"""
+import asyncio
+from pathlib import Path
+
+import app.database
+from app.api.plugins import upload
+from app.services.git_service import git_service
+
+
+class _RecordingSession:
+    """Stands in for AsyncSessionLocal() and records the statements it is given"""
+    
+    def __init__(self, calls):
+        self.calls = calls
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, *exc):
+        return False
+    
+    async def execute(self, statement):
+        self.calls.append(statement)
+    
+    async def commit(self):
+        self.calls.append("commit")
+
+
+def _push(tmp_path: Path) -> bool:
+    return asyncio.run(upload._push_plugin_to_git(
+        plugin_version_id="version-id",
+        repo_url="https://github.com/example/plugins.git",
+        branch="plugin-demo-v1.0.0",
+        source_dir=tmp_path,
+        commit_message="Add plugin demo version 1.0.0"
+    ))
+
+
+def test_push_failure_leaves_version_on_zip(monkeypatch, tmp_path):
+    calls = []
+    monkeypatch.setattr(app.database, "AsyncSessionLocal", lambda: _RecordingSession(calls))
+    
+    def failing_push(**kwargs):
+        raise RuntimeError("remote rejected")
+    monkeypatch.setattr(git_service, "initialize_and_push_plugin", failing_push)
+    
+    assert _push(tmp_path) is False
+    # The git fields are never written, so deployments keep using plugin.zip
+    assert calls == []
+
+
+def test_push_success_sets_git_fields(monkeypatch, tmp_path):
+    calls = []
+    monkeypatch.setattr(app.database, "AsyncSessionLocal", lambda: _RecordingSession(calls))
+    
+    pushed = []
+    monkeypatch.setattr(git_service, "initialize_and_push_plugin", lambda **kwargs: pushed.append(kwargs))
+    
+    assert _push(tmp_path) is True
+    assert pushed[0]["branch"] == "plugin-demo-v1.0.0"
+    statement, commit = calls
+    assert commit == "commit"
+    params = statement.compile().params
+    assert params["git_repo_url"] == "https://github.com/example/plugins.git"
+    assert params["git_branch"] == "plugin-demo-v1.0.0"
@@ -0,0 +1,47 @@
+"""Tests for plugin version ordering"""
+import pytest
+
+from app.core.versions import version_key
+
+
+def _sorted(versions):
+    return sorted(versions, key=version_key)
+
+
+def test_release_numbers_compare_numerically():
+    assert _sorted(["10.0.0", "2.0.0", "1.10.0", "1.9.0"]) == ["1.9.0", "1.10.0", "2.0.0", "10.0.0"]
+
+
+def test_prerelease_sorts_below_its_release():
+    assert version_key("1.0.0-beta") < version_key("1.0.0")
+    assert version_key("1.0.0rc1") < version_key("1.0.0")
+    assert version_key("1.0.0") < version_key("1.0.1-alpha")
+
+
+def test_semver_precedence_example():
+    # Precedence example from the semver 2.0.0 spec, section 11
+    expected = [
+        "1.0.0-alpha",
+        "1.0.0-alpha.1",
+        "1.0.0-alpha.beta",
+        "1.0.0-beta",
+        "1.0.0-beta.2",
+        "1.0.0-beta.11",
+        "1.0.0-rc.1",
+        "1.0.0",
+    ]
+    assert _sorted(reversed(expected)) == expected
+
+
+@pytest.mark.parametrize("left, right", [
+    ("1.0", "1.0.0"),
+    ("v1.2.3", "1.2.3"),
+    ("1.2.3+build.5", "1.2.3"),
+    ("1.0.0-RC.1", "1.0.0-rc.1"),
+])
+def test_equivalent_versions(left, right):
+    assert version_key(left) == version_key(right)
+
+
+def test_unnumbered_versions_sort_first():
+    assert _sorted(["1.0.0", "latest", "0.0.1"]) == ["latest", "0.0.1", "1.0.0"]